@@ -6,7 +6,9 @@ from sqlmodel import SQLModel
 
 from alembic import context
 from src.config.settings import settings
-from src.schemas.users import User, Verifications
+from src.schemas.users import FuelPrice, User, Verifications
+from src.schemas.sms import OutboundSMS
+from src.schemas.sales import SalesDaily, SalesHourly
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
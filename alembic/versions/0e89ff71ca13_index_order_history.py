@@ -0,0 +1,34 @@
+"""index order history
+
+Revision ID: 0e89ff71ca13
+Revises: 615175fb5f9d
+Create Date: 2026-10-17 02:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0e89ff71ca13'
+down_revision: Union[str, None] = '615175fb5f9d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_order_user_id_created_at',
+        'order',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(op.f('ix_payment_order_id'), 'payment', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payment_order_id'), table_name='payment')
+    op.drop_index('ix_order_user_id_created_at', table_name='order')
@@ -0,0 +1,48 @@
+"""add fuel price versions
+
+Revision ID: 3a555c21a097
+Revises: 4df8f2dadc01
+Create Date: 2026-10-17 03:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a555c21a097'
+down_revision: Union[str, None] = '4df8f2dadc01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('fuel_price',
+    sa.Column('price_per_liter', sa.Float(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('effective_from', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_fuel_price_effective_from'), 'fuel_price', ['effective_from'], unique=False)
+
+    # Existing orders keep NULL, they were billed at the configured PRICE_PER_LITER
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.add_column(sa.Column('price_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('price_per_liter', sa.Float(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_order_price_id_fuel_price', 'fuel_price', ['price_id'], ['id']
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('order') as batch_op:
+        batch_op.drop_constraint('fk_order_price_id_fuel_price', type_='foreignkey')
+        batch_op.drop_column('price_per_liter')
+        batch_op.drop_column('price_id')
+
+    op.drop_index(op.f('ix_fuel_price_effective_from'), table_name='fuel_price')
+    op.drop_table('fuel_price')
@@ -0,0 +1,40 @@
+"""add payment processing columns
+
+Revision ID: 41ceaeb1ec04
+Revises: 3a555c21a097
+Create Date: 2026-10-17 04:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '41ceaeb1ec04'
+down_revision: Union[str, None] = '3a555c21a097'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing payments get no next_check_at, queue them with POST /payments/{id}/charge
+    with op.batch_alter_table('payment') as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('next_check_at', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('claim_token', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=True))
+        batch_op.add_column(sa.Column('failure_reason', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.create_unique_constraint('uq_payment_transaction_ref', ['transaction_ref'])
+        batch_op.create_index('ix_payment_status_next_check_at', ['status', 'next_check_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('payment') as batch_op:
+        batch_op.drop_index('ix_payment_status_next_check_at')
+        batch_op.drop_constraint('uq_payment_transaction_ref', type_='unique')
+        batch_op.drop_column('failure_reason')
+        batch_op.drop_column('claim_token')
+        batch_op.drop_column('next_check_at')
+        batch_op.drop_column('attempts')
@@ -0,0 +1,27 @@
+"""index order created_at
+
+Revision ID: 4957b8f77f13
+Revises: 0e89ff71ca13
+Create Date: 2026-10-17 02:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4957b8f77f13'
+down_revision: Union[str, None] = '0e89ff71ca13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_order_created_at'), 'order', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_created_at'), table_name='order')
@@ -0,0 +1,43 @@
+"""add sales rollups
+
+Revision ID: 4df8f2dadc01
+Revises: 4957b8f77f13
+Create Date: 2026-10-17 03:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4df8f2dadc01'
+down_revision: Union[str, None] = '4957b8f77f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sales_daily',
+    sa.Column('liters', sa.Float(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('day', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('sales_hourly',
+    sa.Column('liters', sa.Float(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('hour', sqlmodel.sql.sqltypes.AutoString(length=13), nullable=False),
+    sa.PrimaryKeyConstraint('hour')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_hourly')
+    op.drop_table('sales_daily')
@@ -0,0 +1,47 @@
+"""index phone number lookups
+
+Revision ID: 615175fb5f9d
+Revises: c944268d8f5c
+Create Date: 2026-10-17 02:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '615175fb5f9d'
+down_revision: Union[str, None] = 'c944268d8f5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(
+        sa.text(
+            'SELECT phone_number, COUNT(*) FROM "user" '
+            'WHERE phone_number IS NOT NULL '
+            'GROUP BY phone_number HAVING COUNT(*) > 1'
+        )
+    ).fetchall()
+    if duplicates:
+        numbers = ", ".join(row[0] for row in duplicates)
+        raise RuntimeError(
+            f"Cannot add unique index on user.phone_number, duplicate numbers: {numbers}"
+        )
+
+    op.create_index(op.f('ix_user_phone_number'), 'user', ['phone_number'], unique=True)
+    op.create_index(
+        'ix_verifications_active_lookup',
+        'verifications',
+        ['phone_number', 'is_active', 'is_verified', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_verifications_active_lookup', table_name='verifications')
+    op.drop_index(op.f('ix_user_phone_number'), table_name='user')
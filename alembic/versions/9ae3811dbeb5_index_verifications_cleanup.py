@@ -0,0 +1,32 @@
+"""index verifications cleanup
+
+Revision ID: 9ae3811dbeb5
+Revises: 41ceaeb1ec04
+Create Date: 2026-10-17 04:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9ae3811dbeb5'
+down_revision: Union[str, None] = '41ceaeb1ec04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_verifications_is_active_created_at',
+        'verifications',
+        ['is_active', 'created_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_verifications_is_active_created_at', table_name='verifications')
@@ -0,0 +1,132 @@
+"""store timestamps as native timestamp columns
+
+Revision ID: b2f1c7d9e3a4
+Revises: 9ae3811dbeb5
+Create Date: 2026-10-17 05:00:00.000000
+
+Timestamps used to be written as naive local ISO strings. They become
+TIMESTAMP WITH TIME ZONE holding UTC; on SQLite, which has no timezone
+support, naive UTC in SQLAlchemy's DATETIME format. Existing values are
+read as local time in LEGACY_TIMEZONE (default UTC), set it to the
+timezone the servers ran in before upgrading. Sales rollup keys are not
+shifted, run `python manage.py rebuild-sales` afterwards if it is not UTC.
+
+"""
+import os
+from datetime import datetime
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f1c7d9e3a4'
+down_revision: Union[str, None] = '9ae3811dbeb5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> [(column, NOT NULL with a server default)]
+COLUMNS = {
+    'user': [('created_at', True), ('updated_at', True)],
+    'verifications': [('created_at', True), ('updated_at', True)],
+    'order': [('created_at', True), ('updated_at', True)],
+    'payment': [
+        ('created_at', True),
+        ('updated_at', True),
+        ('payment_date', False),
+        ('next_check_at', False),
+    ],
+    'sms_outbox': [('next_attempt_at', True), ('created_at', True), ('updated_at', True)],
+    'fuel_price': [('effective_from', True), ('created_at', True)],
+    'sales_daily': [('updated_at', True)],
+    'sales_hourly': [('updated_at', True)],
+}
+
+LEGACY_TIMEZONE = os.environ.get('LEGACY_TIMEZONE', 'UTC')
+
+
+def _sqlite_offset_seconds() -> int:
+    """UTC offset of LEGACY_TIMEZONE, SQLite has no timezone database"""
+    offset = datetime.now(ZoneInfo(LEGACY_TIMEZONE)).utcoffset()
+    return int(offset.total_seconds())
+
+
+def _rewrite_sqlite(table: str, columns, fmt: str, shift: int) -> None:
+    # strftime drops microseconds, the ISO strings keep them at offset 20
+    assignments = ', '.join(
+        f"{column} = strftime('{fmt}', {column}, '{shift} seconds') || substr({column}, 20, 7)"
+        for column, _ in columns
+    )
+    op.execute(f'UPDATE "{table}" SET {assignments}')
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table, columns in COLUMNS.items():
+        for column, required in columns:
+            if required:
+                op.execute(
+                    f'UPDATE "{table}" SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL'
+                )
+
+        if bind.dialect.name == 'sqlite':
+            _rewrite_sqlite(table, columns, '%Y-%m-%d %H:%M:%S', -_sqlite_offset_seconds())
+            # Reflect as DATETIME so the table copy does not CAST the text to a number
+            with op.batch_alter_table(
+                table,
+                reflect_args=[
+                    sa.Column(column, sa.DateTime(timezone=True)) for column, _ in columns
+                ],
+            ) as batch_op:
+                for column, required in columns:
+                    batch_op.alter_column(
+                        column,
+                        type_=sa.DateTime(timezone=True),
+                        nullable=not required,
+                        server_default=sa.func.now() if required else None,
+                    )
+            continue
+
+        for column, required in columns:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(timezone=True),
+                existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                nullable=not required,
+                server_default=sa.func.now() if required else None,
+                postgresql_using=f"{column}::timestamp AT TIME ZONE '{LEGACY_TIMEZONE}'",
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table, columns in COLUMNS.items():
+        if bind.dialect.name == 'sqlite':
+            with op.batch_alter_table(table) as batch_op:
+                for column, required in columns:
+                    batch_op.alter_column(
+                        column,
+                        type_=sqlmodel.sql.sqltypes.AutoString(),
+                        nullable=not required or table in ('user', 'verifications'),
+                        server_default=None,
+                    )
+            _rewrite_sqlite(table, columns, '%Y-%m-%dT%H:%M:%S', _sqlite_offset_seconds())
+            continue
+
+        for column, required in columns:
+            op.alter_column(
+                table,
+                column,
+                type_=sqlmodel.sql.sqltypes.AutoString(),
+                existing_type=sa.DateTime(timezone=True),
+                nullable=not required or table in ('user', 'verifications'),
+                server_default=None,
+                postgresql_using=(
+                    f"to_char({column} AT TIME ZONE '{LEGACY_TIMEZONE}', "
+                    f"'YYYY-MM-DD\"T\"HH24:MI:SS.US')"
+                ),
+            )
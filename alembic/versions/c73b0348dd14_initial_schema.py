@@ -0,0 +1,88 @@
+"""initial schema
+
+Revision ID: c73b0348dd14
+Revises: 
+Create Date: 2024-12-07 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c73b0348dd14'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user',
+        sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(length=13), nullable=True),
+        sa.Column('plate_number', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=True),
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('otp', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_verified', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_user_id'), 'user', ['id'], unique=False)
+    op.create_table(
+        'verifications',
+        sa.Column('otp', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(length=13), nullable=True),
+        sa.Column('is_verified', sa.Boolean(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_verifications_id'), 'verifications', ['id'], unique=False)
+    op.create_table(
+        'order',
+        sa.Column('volume', sa.Float(), nullable=False),
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'CONFIRMED', 'CANCELLED', 'COMPLETED', name='orderstatus'), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_order_id'), 'order', ['id'], unique=False)
+    op.create_table(
+        'payment',
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('payment_method', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('transaction_ref', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('order_id', sa.Uuid(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'PAID', 'FAILED', 'REFUNDED', name='paymentstatus'), nullable=False),
+        sa.Column('payment_date', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['order.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_payment_id'), 'payment', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payment_id'), table_name='payment')
+    op.drop_table('payment')
+    op.drop_index(op.f('ix_order_id'), table_name='order')
+    op.drop_table('order')
+    op.drop_index(op.f('ix_verifications_id'), table_name='verifications')
+    op.drop_table('verifications')
+    op.drop_index(op.f('ix_user_id'), table_name='user')
+    op.drop_table('user')
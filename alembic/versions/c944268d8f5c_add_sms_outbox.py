@@ -0,0 +1,47 @@
+"""add sms outbox
+
+Revision ID: c944268d8f5c
+Revises: c73b0348dd14
+Create Date: 2026-10-17 02:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c944268d8f5c'
+down_revision: Union[str, None] = 'c73b0348dd14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sms_outbox',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(length=13), nullable=False),
+        sa.Column('message', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'SENDING', 'SENT', 'FAILED', name='smsstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('claim_token', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=True),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('message_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('cost', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('updated_at', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_sms_outbox_id'), 'sms_outbox', ['id'], unique=False)
+    op.create_index('ix_sms_outbox_status_next_attempt_at', 'sms_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sms_outbox_status_next_attempt_at', table_name='sms_outbox')
+    op.drop_index(op.f('ix_sms_outbox_id'), table_name='sms_outbox')
+    op.drop_table('sms_outbox')
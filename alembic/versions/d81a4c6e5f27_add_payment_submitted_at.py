@@ -0,0 +1,29 @@
+"""add payment submitted_at
+
+Revision ID: d81a4c6e5f27
+Revises: b2f1c7d9e3a4
+Create Date: 2026-10-17 06:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81a4c6e5f27'
+down_revision: Union[str, None] = 'b2f1c7d9e3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('payment') as batch_op:
+        batch_op.add_column(sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('payment') as batch_op:
+        batch_op.drop_column('submitted_at')
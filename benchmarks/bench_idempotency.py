@@ -0,0 +1,95 @@
+"""
+Benchmark webhook retry storms with and without idempotency keys.
+
+Sends every order webhook several times at once, as the chatbot platform
+does when it times out and retries, through the ASGI app against a
+throwaway SQLite database. Runs the storm once without a message id and
+once with one, and reports the orders created, the requests that did the
+work, and the time taken.
+
+    python -m benchmarks.bench_idempotency --webhooks 200 --retries 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP, 'bench.db')}"
+os.environ.setdefault("SMS_GATEWAY", "fake")
+os.environ.setdefault("PAYMENT_PROVIDER", "fake")
+os.environ.setdefault("OTP_SECRET", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("SMS_OUTBOX_IN_PROCESS", "PAYMENT_IN_PROCESS", "VERIFICATION_CLEANUP_IN_PROCESS"):
+    os.environ.setdefault(name, "false")
+
+import httpx  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+from sqlmodel import Session, SQLModel, select  # noqa: E402
+
+from src.app.main import create_app  # noqa: E402
+from src.database.db_config import async_engine, engine  # noqa: E402
+from src.schemas.users import Order  # noqa: E402
+
+PHONE_NUMBER = "0712345672"
+
+
+def count_orders() -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(Order)).one()
+
+
+async def storm(client, webhooks: int, retries: int, keyed: bool, run: str) -> None:
+    before = count_orders()
+
+    async def deliver(i: int):
+        body = {"user_id": PHONE_NUMBER, "volume": 10}
+        if keyed:
+            body["message_id"] = f"{run}-{i}"
+        return await asyncio.gather(*(client.post("/orders/", json=body) for _ in range(retries)))
+
+    started = time.perf_counter()
+    responses = [
+        response
+        for deliveries in await asyncio.gather(*(deliver(i) for i in range(webhooks)))
+        for response in deliveries
+    ]
+    elapsed = time.perf_counter() - started
+
+    replayed = sum(1 for response in responses if response.headers.get("idempotent-replayed"))
+    print(
+        f"{'with message id' if keyed else 'without key':<16} | "
+        f"{count_orders() - before:>6} orders | {len(responses) - replayed:>6} executed | "
+        f"{replayed:>6} replayed | {elapsed:>6.2f}s"
+    )
+
+
+async def run(webhooks: int, retries: int) -> None:
+    SQLModel.metadata.create_all(engine)
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60
+        ) as client:
+            await client.post(
+                "/registration/r",
+                json={"phone_number": PHONE_NUMBER, "plate_number": "T123ABC"},
+            )
+            print(f"{webhooks} order webhooks, each delivered {retries} times at once:")
+            await storm(client, webhooks, retries, keyed=False, run="plain")
+            await storm(client, webhooks, retries, keyed=True, run="keyed")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--webhooks", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=4)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.webhooks, args.retries))
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
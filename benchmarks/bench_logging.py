@@ -0,0 +1,134 @@
+"""
+Benchmark what a log call costs the thread that makes it.
+
+Times logger.info() on the calling thread, a few calls at a time like a
+request, for the old setup (f-string message, plain text written inline),
+the JSON formatter with redaction written inline, and the queue pipeline
+from configure_logging where that work happens on the listener thread.
+Also times a disabled DEBUG call and a record dropped by route sampling.
+Output goes to /dev/null.
+
+    python -m benchmarks.bench_logging --calls 50000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from src.config import log_config
+from src.config.log_config import (
+    RequestContext,
+    build_formatter,
+    configure_logging,
+    current_request,
+    shutdown_logging,
+)
+from src.config.settings import settings
+
+PHONE_NUMBER = "+255712345672"
+
+
+def reset_root() -> logging.Logger:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    return root
+
+
+def wait_for_listener() -> float:
+    """Seconds until the listener has written everything queued so far"""
+    started = time.perf_counter()
+    while log_config._listener is not None and not log_config._listener.queue.empty():
+        time.sleep(0.01)
+    return time.perf_counter() - started
+
+
+def time_calls(calls: int, log, burst: int = 0) -> float:
+    """
+    Mean microseconds per call. With a burst size, calls are made a few at a
+    time, like a request logging a handful of records, and the listener is
+    left to catch up between bursts outside the timed section.
+    """
+    elapsed = 0.0
+    burst = burst or calls
+    for offset in range(0, calls, burst):
+        started = time.perf_counter()
+        for i in range(offset, min(offset + burst, calls)):
+            log(i)
+        elapsed += time.perf_counter() - started
+        if burst < calls:
+            wait_for_listener()
+            time.sleep(0.001)
+    return elapsed / calls * 1e6
+
+
+class FakeRoute:
+    path = "/registration/status/{phone_number}"
+
+
+def run(calls: int) -> None:
+    logger = logging.getLogger("bench")
+    devnull = open(os.devnull, "w")
+
+    root = reset_root()
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+    root.addHandler(handler)
+    inline = time_calls(
+        calls, lambda i: logger.info(f"Attempting to send SMS to {PHONE_NUMBER} ({i})"), burst=5
+    )
+    print(f"text inline, f-string          | {inline:>7.2f} us/call")
+
+    handler.setFormatter(build_formatter("json"))
+    inline_json = time_calls(
+        calls,
+        lambda i: logger.info("Attempting to send SMS to %s (%d)", PHONE_NUMBER, i),
+        burst=5,
+    )
+    print(f"JSON + redaction inline        | {inline_json:>7.2f} us/call")
+
+    reset_root()
+    sys_stderr, sys.stderr = sys.stderr, devnull
+    try:
+        configure_logging()
+        sustained = time_calls(
+            calls, lambda i: logger.info("Attempting to send SMS to %s (%d)", PHONE_NUMBER, i)
+        )
+        drain = wait_for_listener()
+        queued = time_calls(
+            calls,
+            lambda i: logger.info("Attempting to send SMS to %s (%d)", PHONE_NUMBER, i),
+            burst=5,
+        )
+        disabled = time_calls(
+            calls, lambda i: logger.debug("Payload %s (%d)", {"phone_number": PHONE_NUMBER}, i)
+        )
+
+        sampler = log_config.RouteSampler(0.0)
+        handler = logging.getLogger().handlers[0]
+        handler.filters = [sampler]
+        token = current_request.set(RequestContext({"route": FakeRoute()}))
+        sampled_out = time_calls(
+            calls, lambda i: logger.info("Attempting to send SMS to %s (%d)", PHONE_NUMBER, i)
+        )
+        current_request.reset(token)
+        shutdown_logging()
+    finally:
+        sys.stderr = sys_stderr
+
+    print(f"JSON + redaction via the queue | {queued:>7.2f} us/call")
+    print(f"  sustained, no pauses         | {sustained:>7.2f} us/call, listener competing for the GIL")
+    print(f"disabled level (DEBUG)         | {disabled:>7.2f} us/call")
+    print(f"dropped by route sampling      | {sampled_out:>7.2f} us/call")
+    print(f"listener drained the backlog in {drain:.2f}s after the calls returned")
+    devnull.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+    settings.LOG_FORMAT = "json"
+    run(args.calls)
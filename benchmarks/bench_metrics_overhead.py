@@ -0,0 +1,180 @@
+"""
+Benchmark the request-time overhead of the metrics middleware and query hooks.
+
+Serves the same requests through the ASGI app in-process, alternating
+rounds with instrumentation on (MetricsMiddleware plus the engine's
+before/after_cursor_execute hooks) and off, against a throwaway SQLite
+database. Round-to-round noise is larger than the effect, so the
+instrumentation is also timed alone (middleware around a no-op app plus
+the query hooks) and compared to the median request time; the exit status
+is 1 when that share exceeds the budget.
+
+    python -m benchmarks.bench_metrics_overhead --requests 2000 --budget-pct 2
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP, 'bench.db')}"
+os.environ.setdefault("SMS_GATEWAY", "fake")
+os.environ.setdefault("PAYMENT_PROVIDER", "fake")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Background workers would share the event loop with the measured requests
+for name in ("SMS_OUTBOX_IN_PROCESS", "PAYMENT_IN_PROCESS", "VERIFICATION_CLEANUP_IN_PROCESS"):
+    os.environ.setdefault(name, "false")
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.app.main import create_app  # noqa: E402
+from src.config.settings import settings  # noqa: E402
+from src.database.db_config import (  # noqa: E402
+    async_engine,
+    engine,
+    start_query_timer,
+    stop_query_timer,
+)
+from src.utils.metrics import MetricsMiddleware  # noqa: E402
+
+PHONE_NUMBER = "0712345672"
+
+
+def set_query_hooks(enabled: bool) -> None:
+    target = async_engine.sync_engine
+    for name, hook in (
+        ("before_cursor_execute", start_query_timer),
+        ("after_cursor_execute", stop_query_timer),
+    ):
+        if enabled and not event.contains(target, name, hook):
+            event.listen(target, name, hook)
+        elif not enabled and event.contains(target, name, hook):
+            event.remove(target, name, hook)
+
+
+def build_apps():
+    settings.METRICS_ENABLED = True
+    instrumented = create_app()
+    settings.METRICS_ENABLED = False
+    bare = create_app()
+    settings.METRICS_ENABLED = True
+    return instrumented, bare
+
+
+async def time_round(app, paths, requests: int) -> float:
+    """Mean seconds per request"""
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        for i in range(requests):
+            response = await client.get(paths[i % len(paths)])
+            response.raise_for_status()
+        return (time.perf_counter() - started) / requests
+
+
+class FakeExecutionContext:
+    pass
+
+
+async def time_instrumentation(queries_per_request: int, requests: int = 20000) -> float:
+    """Seconds the middleware and query hooks add to one request"""
+
+    async def noop_app(scope, receive, send):
+        context = FakeExecutionContext()
+        for _ in range(queries_per_request):
+            start_query_timer(None, None, None, None, context, False)
+            stop_query_timer(None, None, None, None, context, False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+    timings = []
+    for app in (noop_app, MetricsMiddleware(noop_app)):
+        started = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        timings.append((time.perf_counter() - started) / requests)
+    return timings[1] - timings[0]
+
+
+async def run(requests: int, rounds: int) -> float:
+    SQLModel.metadata.create_all(engine)
+    instrumented, bare = build_apps()
+
+    async with instrumented.router.lifespan_context(instrumented):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=instrumented), base_url="http://bench"
+        ) as client:
+            await client.post(
+                "/registration/r",
+                json={"phone_number": PHONE_NUMBER, "plate_number": "T123ABC"},
+            )
+            order = (
+                await client.post("/orders/", json={"user_id": PHONE_NUMBER, "volume": 10})
+            ).json()
+
+        paths = [
+            f"/orders/{order['order_id']}",
+            f"/orders/?user_id={PHONE_NUMBER}&limit=10",
+            "/prices/current",
+        ]
+        # Warm up imports, caches and the connection pool for both apps
+        for app, hooks in ((instrumented, True), (bare, False)):
+            set_query_hooks(hooks)
+            await time_round(app, paths, requests // 10 or 1)
+
+        overheads, bare_timings = [], []
+        for i in range(rounds):
+            set_query_hooks(True)
+            on = await time_round(instrumented, paths, requests)
+            set_query_hooks(False)
+            off = await time_round(bare, paths, requests)
+            bare_timings.append(off)
+            overheads.append((on - off) / off * 100)
+            print(
+                f"round {i + 1:>2} | on {on * 1e6:>8.1f} us/req | off {off * 1e6:>8.1f} us/req | "
+                f"overhead {overheads[-1]:>+6.2f}%"
+            )
+        set_query_hooks(True)
+
+    print(
+        f"median end-to-end overhead {statistics.median(overheads):+.2f}% "
+        f"over {rounds} rounds of {requests} requests"
+    )
+
+    # The measured requests issue one or two queries each
+    cost = await time_instrumentation(queries_per_request=2)
+    request_time = statistics.median(bare_timings)
+    overhead = cost / request_time * 100
+    print(
+        f"instrumentation alone {cost * 1e6:.1f} us/req, "
+        f"{overhead:.2f}% of a {request_time * 1e6:.0f} us request"
+    )
+    return overhead
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--budget-pct", type=float, default=2.0)
+    args = parser.parse_args()
+
+    try:
+        overhead = asyncio.run(run(args.requests, args.rounds))
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+    sys.exit(1 if overhead > args.budget_pct else 0)
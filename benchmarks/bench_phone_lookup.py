@@ -0,0 +1,84 @@
+"""
+Benchmark User.phone_number lookups as the user table grows.
+
+Builds a throwaway SQLite database, grows the user table step by step and
+times the same select(User).where(User.phone_number == ...) query the API
+runs, with and without the ix_user_phone_number index.
+
+    python -m benchmarks.bench_phone_lookup --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from uuid import uuid4
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.schemas.users import User
+
+
+def phone_for(i: int) -> str:
+    return f"+2557{i:08d}"
+
+
+def grow(engine, start: int, stop: int, chunk: int = 50_000) -> None:
+    with engine.begin() as conn:
+        for offset in range(start, stop, chunk):
+            conn.execute(
+                insert(User.__table__),
+                [
+                    {
+                        "id": uuid4(),
+                        "phone_number": phone_for(i),
+                        "plate_number": "T123ABC",
+                        "is_active": True,
+                        "is_verified": i % 2 == 0,
+                    }
+                    for i in range(offset, min(offset + chunk, stop))
+                ],
+            )
+
+
+def time_lookups(engine, size: int, lookups: int) -> float:
+    numbers = [phone_for(random.randrange(size)) for _ in range(lookups)]
+    with Session(engine) as session:
+        started = time.perf_counter()
+        for number in numbers:
+            session.exec(select(User).where(User.phone_number == number)).first()
+        elapsed = time.perf_counter() - started
+    return elapsed / lookups * 1e6
+
+
+def run(sizes, lookups: int, indexed: bool) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine, tables=[User.__table__])
+        if not indexed:
+            with engine.begin() as conn:
+                conn.execute(text("DROP INDEX ix_user_phone_number"))
+
+        label = "indexed" if indexed else "no index"
+        current = 0
+        for size in sorted(sizes):
+            grow(engine, current, size)
+            current = size
+            # Full scans get slow quickly, keep the unindexed run short
+            count = lookups if indexed else max(10, lookups // 100)
+            per_lookup = time_lookups(engine, size, count)
+            print(f"{label:>9} | {size:>10,} users | {per_lookup:>10.1f} us/lookup")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--skip-unindexed", action="store_true")
+    args = parser.parse_args()
+
+    run(args.sizes, args.lookups, indexed=True)
+    if not args.skip_unindexed:
+        run(args.sizes, args.lookups, indexed=False)
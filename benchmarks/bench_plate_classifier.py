@@ -0,0 +1,60 @@
+"""
+Compare the compiled plate classifier with the model-per-type validator.
+
+The legacy path builds one pydantic model per plate type until one
+validates, which is what PlateNumberValidator.validate_plate used to do.
+
+    python -m benchmarks.bench_plate_classifier --plates 20000
+"""
+import argparse
+import random
+import string
+import time
+
+from src.utils.platenummbers import PlateNumberValidator, plate_classifier
+
+
+def legacy_validate_plate(plate_number: str):
+    plate_number = plate_number.upper().replace("-", " ").strip()
+    for plate_type, validator_class in PlateNumberValidator.PLATE_TYPES.items():
+        try:
+            validated_plate = validator_class(plate=plate_number)
+            return True, validated_plate.plate, plate_type
+        except ValueError:
+            continue
+    return False, None, None
+
+
+def sample_plates(count: int):
+    letters = string.ascii_uppercase
+    makers = [
+        lambda: f"{''.join(random.choices(letters, k=3))}-{random.randint(1000, 9999)}",
+        lambda: f"T {random.randint(100, 999)} {''.join(random.choices(letters, k=3))}",
+        lambda: f"su-{random.randint(1000, 9999)}",
+        lambda: f"MC {random.randint(100, 999)} {''.join(random.choices(letters, k=3))}",
+        lambda: f"D-{random.randint(1000, 9999)}-{''.join(random.choices(letters, k=3))}",
+        lambda: "not a plate!",
+    ]
+    return [random.choice(makers)() for _ in range(count)]
+
+
+def timed(label: str, fn, plates) -> float:
+    started = time.perf_counter()
+    fn(plates)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>16} | {elapsed / len(plates) * 1e6:8.2f} us/plate")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--plates", type=int, default=20000)
+    args = parser.parse_args()
+
+    plates = sample_plates(args.plates)
+    assert [legacy_validate_plate(p) for p in plates] == plate_classifier.classify_many(plates)
+
+    legacy = timed("legacy models", lambda ps: [legacy_validate_plate(p) for p in ps], plates)
+    single = timed("classify", lambda ps: [plate_classifier.classify(p) for p in ps], plates)
+    bulk = timed("classify_many", plate_classifier.classify_many, plates)
+    print(f"speedup: {legacy / single:.1f}x (classify), {legacy / bulk:.1f}x (classify_many)")
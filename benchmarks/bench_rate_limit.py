@@ -0,0 +1,128 @@
+"""
+Benchmark the OTP rate limiter.
+
+Times a check against the in-memory token buckets (phone, client IP and
+global, as the registration endpoints take them) while the number of
+live buckets grows, to show the cost per check stays flat. Then floods
+POST /registration/r for one phone number through the ASGI app against a
+throwaway SQLite database and compares an accepted registration with a
+rejected one, counting the database queries each issued.
+
+    python -m benchmarks.bench_rate_limit --sizes 1000 10000 100000 --checks 100000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP, 'bench.db')}"
+os.environ.setdefault("SMS_GATEWAY", "fake")
+os.environ.setdefault("PAYMENT_PROVIDER", "fake")
+os.environ.setdefault("OTP_SECRET", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+for name in ("SMS_OUTBOX_IN_PROCESS", "PAYMENT_IN_PROCESS", "VERIFICATION_CLEANUP_IN_PROCESS"):
+    os.environ.setdefault(name, "false")
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from src.app.main import create_app  # noqa: E402
+from src.database.db_config import async_engine, engine  # noqa: E402
+from src.utils.ratelimit import Limit, MemoryTokenBuckets  # noqa: E402
+
+PHONE_NUMBER = "0712345672"
+
+
+def phone_for(i: int) -> str:
+    return f"+2557{i:08d}"
+
+
+async def time_checks(size: int, checks: int) -> float:
+    """Mean microseconds per take() with size phone buckets live"""
+    buckets = MemoryTokenBuckets(maxsize=size * 2)
+    # Roomy enough that every check is accepted and writes its buckets back
+    phone, total = Limit(1e9, 1e9), Limit(1e12, 1e12)
+    keys = [f"ratelimit:otp:phone:{phone_for(i)}" for i in range(size)]
+    for key in keys:
+        await buckets.take([(key, phone)])
+
+    started = time.perf_counter()
+    for i in range(checks):
+        await buckets.take(
+            [
+                (keys[i % size], phone),
+                ("ratelimit:otp:ip:10.0.0.1", total),
+                ("ratelimit:otp:global:all", total),
+            ]
+        )
+    return (time.perf_counter() - started) / checks * 1e6
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, *args):
+        self.queries += 1
+
+
+async def time_flood(requests: int) -> None:
+    SQLModel.metadata.create_all(engine)
+    app = create_app()
+    counter = QueryCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            timings = {}
+            for i in range(requests):
+                queries = counter.queries
+                started = time.perf_counter()
+                response = await client.post(
+                    "/registration/r",
+                    json={"phone_number": PHONE_NUMBER, "plate_number": "T123ABC"},
+                )
+                elapsed = time.perf_counter() - started
+                total, count, query_total = timings.get(response.status_code, (0.0, 0, 0))
+                timings[response.status_code] = (
+                    total + elapsed,
+                    count + 1,
+                    query_total + counter.queries - queries,
+                )
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+    await async_engine.dispose()
+
+    print(f"\n{requests} registrations for one phone number through the app:")
+    for code, (total, count, query_total) in sorted(timings.items()):
+        print(
+            f"status {code} | {count:>6} requests | {total / count * 1e6:>9.1f} us/req | "
+            f"{query_total / count:>5.1f} queries/req"
+        )
+
+
+async def run(sizes, checks: int, requests: int) -> None:
+    print("in-memory buckets, phone + IP + global per check:")
+    for size in sizes:
+        per_check = await time_checks(size, checks)
+        print(f"{size:>9} phone buckets | {per_check:>6.2f} us/check")
+    await time_flood(requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--checks", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args.sizes, args.checks, args.requests))
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
@@ -0,0 +1,173 @@
+"""
+Benchmark Verifications maintenance on a multi-million-row table.
+
+Builds a throwaway SQLite database of legacy verification rows, then times:
+
+- resend: the old ORM load-and-flip loop against the single bulk UPDATE
+  in deactivate_verifications, per call
+- cleanup: VerificationCleaner in chunks against one unchunked
+  UPDATE/DELETE, reporting the total time and the longest single
+  statement, i.e. how long writers are locked out
+
+    python -m benchmarks.bench_verification_cleanup --rows 2000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.database.db_config import create_async_db_engine
+from src.schemas.types import utcnow
+from src.schemas.users import Verifications
+from src.tasks.Maintenance import VerificationCleaner, deactivate_verifications
+
+ROWS_PER_PHONE = 10
+
+
+def phone_for(i: int) -> str:
+    return f"+2557{i:08d}"
+
+
+def build(path: str, rows: int, chunk: int = 100_000) -> None:
+    """Rows spread over 30 days, most inactive, a fifth still active past expiry"""
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine, tables=[Verifications.__table__])
+    engine.dispose()
+
+    now = utcnow().replace(tzinfo=None)
+    user_id = uuid4().hex
+    conn = sqlite3.connect(path)
+    for offset in range(0, rows, chunk):
+        batch = []
+        for i in range(offset, min(offset + chunk, rows)):
+            created_at = now - timedelta(seconds=random.randrange(30 * 86400))
+            created_at = created_at.strftime("%Y-%m-%d %H:%M:%S.%f")  # as UTCDateTime stores it
+            batch.append(
+                (
+                    uuid4().hex,
+                    user_id,
+                    phone_for(i // ROWS_PER_PHONE),
+                    "123456",
+                    random.random() < 0.2,
+                    False,
+                    created_at,
+                    created_at,
+                )
+            )
+        conn.executemany(
+            "INSERT INTO verifications "
+            "(id, user_id, phone_number, otp, is_active, is_verified, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+        conn.commit()
+    conn.close()
+
+
+async def orm_deactivate(session: AsyncSession, phone_number: str) -> None:
+    """The resend path before bulk updates: load every active row and flip it"""
+    rows = (
+        await session.exec(
+            select(Verifications).where(
+                Verifications.phone_number == phone_number,
+                Verifications.is_active == True,
+            )
+        )
+    ).all()
+    for verification in rows:
+        verification.is_active = False
+        verification.updated_at = utcnow()
+    await session.commit()
+
+
+async def bulk_deactivate(session: AsyncSession, phone_number: str) -> None:
+    await deactivate_verifications(session, phone_number)
+    await session.commit()
+
+
+async def time_resend(sessions, phones, deactivate) -> float:
+    async with sessions() as session:
+        started = time.perf_counter()
+        for phone_number in phones:
+            await deactivate(session, phone_number)
+        elapsed = time.perf_counter() - started
+    return elapsed / len(phones) * 1e6
+
+
+class TimedCleaner(VerificationCleaner):
+    """Records the duration of every UPDATE/DELETE statement"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = []
+
+    async def expire_chunk(self, session):
+        started = time.perf_counter()
+        count = await super().expire_chunk(session)
+        self.statements.append(time.perf_counter() - started)
+        return count
+
+    async def delete_chunk(self, session):
+        started = time.perf_counter()
+        count = await super().delete_chunk(session)
+        self.statements.append(time.perf_counter() - started)
+        return count
+
+
+async def run(rows: int, resends: int, chunk_sizes) -> None:
+    phones = [phone_for(i) for i in random.sample(range(rows // ROWS_PER_PHONE), 2 * resends)]
+
+    for chunk_size in chunk_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            started = time.perf_counter()
+            build(path, rows)
+            print(f"built {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+            engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}")
+            sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+            if chunk_size == chunk_sizes[0]:
+                orm = await time_resend(sessions, phones[:resends], orm_deactivate)
+                bulk = await time_resend(sessions, phones[resends:], bulk_deactivate)
+                print(f"resend   | orm loop    | {orm:>10.1f} us/call")
+                print(f"resend   | bulk update | {bulk:>10.1f} us/call")
+
+            cleaner = TimedCleaner(chunk_size=chunk_size, session_factory=sessions)
+            started = time.perf_counter()
+            totals = await cleaner.cleanup()
+            elapsed = time.perf_counter() - started
+            label = f"chunk {chunk_size:,}" if chunk_size < rows else "unchunked"
+            print(
+                f"cleanup  | {label:>11} | {elapsed:>8.2f}s total | "
+                f"{len(cleaner.statements):>5} statements | "
+                f"longest {max(cleaner.statements) * 1000:>8.1f} ms | "
+                f"{totals['expired']:,} expired, {totals['deleted']:,} deleted"
+            )
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--resends", type=int, default=500)
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.VERIFICATION_CLEANUP_CHUNK_SIZE
+    )
+    parser.add_argument("--skip-unchunked", action="store_true")
+    args = parser.parse_args()
+
+    chunk_sizes = [args.chunk_size]
+    if not args.skip_unchunked:
+        chunk_sizes.append(args.rows)
+    asyncio.run(run(args.rows, args.resends, chunk_sizes))
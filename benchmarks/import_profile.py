@@ -0,0 +1,57 @@
+"""
+Profile the import time of the API and enforce a startup budget.
+
+Runs `python -X importtime -c "import src.app.main"` in fresh interpreters,
+prints the modules with the largest cumulative import time and exits with
+status 1 when the median total exceeds the budget, so it can gate CI.
+
+    python -m benchmarks.import_profile --budget-ms 1000 --top 25
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def profile(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            timings.append((int(cumulative), name.rstrip()))
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="src.app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    args = parser.parse_args()
+
+    runs = [profile(args.module) for _ in range(args.runs)]
+    totals = []
+    for timings in runs:
+        total = next(us for us, name in timings if name.strip() == args.module)
+        totals.append(total / 1000)
+
+    print(f"{'cumulative ms':>14} | module")
+    for us, name in sorted(runs[-1], reverse=True)[: args.top]:
+        print(f"{us / 1000:>14.1f} | {name}")
+
+    median = statistics.median(totals)
+    print(f"\nimport {args.module}: median {median:.1f} ms over {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+    if median > args.budget_ms:
+        print("import time budget exceeded", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,273 @@
+"""
+Load test the chatbot webhook flows against the ASGI app in-process.
+
+Drives the real application through httpx's ASGI transport (no network)
+with the fake SMS gateway and payment provider, against a throwaway SQLite
+database unless --database-url is given. Each virtual user replays a
+conversation: check_user, register, sometimes resend-otp, verify with the
+OTP, check_user again, then creates and reads back a few orders. Reports
+p50/p95/p99 latency and throughput per endpoint, writes the results as
+JSON, and with --baseline exits with status 1 when an endpoint's p95 got
+worse by more than --max-regression-pct.
+
+    python -m benchmarks.load_test --users 200 --concurrency 20 --output results.json
+    python -m benchmarks.load_test --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+PERCENTILES = (50, 95, 99)
+
+
+def configure_environment(database_url: Optional[str]) -> Optional[str]:
+    """Point the app at a scratch database and fake providers, before it is imported"""
+    tmp = None
+    if database_url is None:
+        tmp = tempfile.mkdtemp()
+        database_url = f"sqlite:///{os.path.join(tmp, 'load_test.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["SMS_GATEWAY"] = "fake"
+    os.environ["PAYMENT_PROVIDER"] = "fake"
+    os.environ.setdefault("OTP_SECRET", "load-test")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Every virtual user shares one client address and the global OTP bucket
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return tmp
+
+
+class Recorder:
+    """Latencies and status codes per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.statuses[endpoint][response.status_code] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": len(samples) / elapsed,
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                **{f"p{p}_ms": percentile(samples, p) * 1000 for p in PERCENTILES},
+                "max_ms": samples[-1] * 1000,
+                "statuses": {
+                    str(code): count for code, count in sorted(self.statuses[endpoint].items())
+                },
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "requests": total,
+            "throughput_rps": total / elapsed,
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_samples: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    rank = math.ceil(p / 100 * len(sorted_samples))
+    return sorted_samples[max(rank, 1) - 1]
+
+
+async def conversation(client, recorder: Recorder, user: int, rng: random.Random, args) -> None:
+    from src.utils.otp import otp_engine
+
+    phone_number = f"0712{user:06d}"
+    e164 = f"+255712{user:06d}"
+
+    check_user = {"chat_id": phone_number}
+    await recorder.call(client, "check_user", "POST", "/registration/check_user", json=check_user)
+    await recorder.call(
+        client,
+        "register",
+        "POST",
+        "/registration/r",
+        json={"phone_number": phone_number, "plate_number": "T123ABC"},
+    )
+    if rng.random() < args.resend_ratio:
+        await recorder.call(
+            client,
+            "resend_otp",
+            "POST",
+            "/registration/resend-otp",
+            json={"phone_number": phone_number},
+        )
+    if rng.random() < args.wrong_otp_ratio:
+        await recorder.call(
+            client,
+            "verify",
+            "POST",
+            "/registration/verify",
+            json={"phone_number": phone_number, "verify_otp": "000000"},
+        )
+
+    # The code the user would read from the SMS, from the step it was issued in
+    step = await otp_engine.latest_step(e164)
+    otp = otp_engine.code(e164, step) if step is not None else "000000"
+    await recorder.call(
+        client,
+        "verify",
+        "POST",
+        "/registration/verify",
+        json={"phone_number": phone_number, "verify_otp": otp},
+    )
+    await recorder.call(client, "check_user", "POST", "/registration/check_user", json=check_user)
+
+    for _ in range(rng.randint(1, args.max_orders)):
+        response = await recorder.call(
+            client,
+            "create_order",
+            "POST",
+            "/orders/",
+            json={"user_id": phone_number, "volume": rng.choice([5, 10, 20, 40])},
+        )
+        if response.status_code == 201:
+            order_id = response.json()["order_id"]
+            await recorder.call(client, "get_order", "GET", f"/orders/{order_id}")
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+    from sqlmodel import SQLModel
+
+    from src.app.main import create_app
+    from src.database.db_config import async_engine, engine
+
+    SQLModel.metadata.create_all(engine)
+    app = create_app()
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def virtual_user(client, user: int) -> None:
+        async with semaphore:
+            await conversation(client, recorder, user, random.Random(rng.random()), args)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://load-test"
+        ) as client:
+            # Warm up imports, caches and the connection pool outside the measurement
+            await client.post("/registration/check_user", json={"chat_id": "0712999999"})
+
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(virtual_user(client, user) for user in range(args.users))
+            )
+            elapsed = time.perf_counter() - started
+
+    await async_engine.dispose()
+    return recorder.summary(elapsed)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(
+        f"{'endpoint':<14} {'requests':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8}  statuses"
+    )
+    for endpoint, stats in results["endpoints"].items():
+        statuses = " ".join(f"{code}x{count}" for code, count in stats["statuses"].items())
+        print(
+            f"{endpoint:<14} {stats['requests']:>8} {stats['throughput_rps']:>9.1f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+            f"{stats['max_ms']:>8.2f}  {statuses}"
+        )
+    print(
+        f"total {results['requests']} requests in {results['elapsed_seconds']:.2f}s, "
+        f"{results['throughput_rps']:.1f} req/s"
+    )
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression_pct: float) -> bool:
+    """Print p95 changes against a baseline run, False if any regressed past the limit"""
+    ok = True
+    print(f"\np95 against baseline {baseline.get('revision') or baseline.get('created_at')}:")
+    for endpoint, stats in results["endpoints"].items():
+        before = baseline["endpoints"].get(endpoint)
+        if before is None:
+            continue
+        change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        regressed = change > max_regression_pct
+        ok = ok and not regressed
+        print(
+            f"{endpoint:<14} {before['p95_ms']:>8.2f} -> {stats['p95_ms']:>8.2f} ms "
+            f"({change:+.1f}%){'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200, help="conversations to replay")
+    parser.add_argument("--concurrency", type=int, default=20, help="conversations in flight")
+    parser.add_argument("--max-orders", type=int, default=3, help="most orders per conversation")
+    parser.add_argument("--resend-ratio", type=float, default=0.2)
+    parser.add_argument("--wrong-otp-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="sync URL of an empty database")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression-pct", type=float, default=20.0)
+    args = parser.parse_args()
+
+    tmp = configure_environment(args.database_url)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "parameters": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "baseline", "database_url")
+        },
+        **results,
+    }
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression_pct):
+            sys.exit(1)
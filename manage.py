@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import sys
+
+from sqlmodel import Session
+
+from src.database.db_config import async_engine, async_session, engine
+from src.tasks.Export import EXPORT_FORMATS, OrderExporter
+from src.tasks.Maintenance import verification_cleaner
+from src.tasks.Sales import sales_aggregator
+
+
+def export(args) -> None:
+    exporter = OrderExporter(start=args.start, end=args.end)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        with Session(engine) as session:
+            for line in exporter.iter_lines(session, args.format):
+                output.write(line)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def rebuild_sales(args) -> None:
+    async def rebuild():
+        async with async_session() as session:
+            await sales_aggregator.rebuild(session)
+        await async_engine.dispose()
+
+    asyncio.run(rebuild())
+
+
+def cleanup(args) -> None:
+    async def run():
+        if args.chunk_size:
+            verification_cleaner.batch_size = args.chunk_size
+        totals = await verification_cleaner.cleanup()
+        await async_engine.dispose()
+        print(f"Verifications: {totals['expired']} expired, {totals['deleted']} deleted")
+
+    asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Filling Station API management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export orders and payments")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export_parser.add_argument("--start", help="Include orders created on or after (ISO date)")
+    export_parser.add_argument("--end", help="Include orders created before (ISO date)")
+    export_parser.add_argument("--output", help="Write to a file instead of stdout")
+    export_parser.set_defaults(handler=export)
+
+    rebuild_parser = commands.add_parser(
+        "rebuild-sales", help="Recompute the sales rollups from completed orders"
+    )
+    rebuild_parser.set_defaults(handler=rebuild_sales)
+
+    cleanup_parser = commands.add_parser(
+        "cleanup", help="Expire and delete stale verifications"
+    )
+    cleanup_parser.add_argument("--chunk-size", type=int, help="Rows per UPDATE/DELETE")
+    cleanup_parser.set_defaults(handler=cleanup)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
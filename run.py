@@ -2,4 +2,6 @@ import uvicorn
 from src.app.main import app
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # create_app() already routed logging through the queue, uvicorn's
+    # default config would reattach its own handlers to its loggers
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
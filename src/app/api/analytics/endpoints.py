@@ -0,0 +1,32 @@
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.db_config import get_async_db
+from src.tasks.Sales import sales_aggregator
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+
+@router.get("/sales", status_code=status.HTTP_200_OK)
+async def get_sales(
+    granularity: str = Query(default="day", pattern="^(day|hour)$"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_db),
+) -> Dict[str, Any]:
+    """
+    Liters, revenue and order counts of completed orders per day or hour,
+    read from the precomputed rollups. start and end must be day or hour
+    boundaries in UTC, end is exclusive
+    """
+    try:
+        return await sales_aggregator.query(
+            session, granularity=granularity, start=start, end=end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,46 @@
+from typing import Any, Callable, Dict
+
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from src.utils.cache import MemoryCache, cache, user_status_cache
+from src.utils.metrics import registry
+from src.utils.phone import phone_normalizer
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Caches that keep hit/miss counters, read on every scrape
+CACHE_STATS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "user_status": user_status_cache.stats,
+    "phone_number": phone_normalizer.stats,
+}
+if isinstance(cache, MemoryCache):
+    CACHE_STATS["shared"] = cache.store.stats
+
+
+def _cache_stat(field: str):
+    def collect():
+        return [((name,), stats()[field]) for name, stats in CACHE_STATS.items()]
+
+    return collect
+
+
+registry.callback(
+    "cache_hits_total", "Cache lookups that hit", ("cache",), _cache_stat("hits"), kind="counter"
+)
+registry.callback(
+    "cache_misses_total", "Cache lookups that missed", ("cache",), _cache_stat("misses"), kind="counter"
+)
+registry.callback("cache_hit_ratio", "Hits over lookups", ("cache",), _cache_stat("hit_ratio"))
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Prometheus text exposition of this process's metrics
+    """
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -1,83 +1,283 @@
+import base64
+import json
 from datetime import datetime
-from sqlmodel import Session, select
-from typing import Dict, Any
-from uuid import UUID
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import joinedload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID, uuid4
+from src.utils.cache import user_status_cache
+from src.utils.phone import phone_normalizer
 from src.utils.utililities import Utilities
-from src.config.settings import settings
 from src.schemas.users import Order, Payment, User
-from src.schemas.orders import OrderBase
+from src.schemas.orders import OrderBase, OrderStatus
+from src.schemas.types import utcnow
+from src.tasks.Payments import payment_worker
+from src.tasks.Pricing import PriceQuote, price_resolver
+from src.tasks.Sales import sales_aggregator
 
 
 class OrderService:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
-        self.gas_price_per_liter = settings.PRICE_PER_LITER
+        self.price_resolver = price_resolver
         self.utilities = Utilities()
 
-    def calculate_total_amount(self, volume: float) -> float:
+    def calculate_total_amount(self, volume: float, price: PriceQuote) -> float:
         """Calculate total amount based on volume"""
-        return volume * self.gas_price_per_liter
+        return volume * price.price_per_liter
 
-    def create_order(self, user_id: str, order_data: dict) -> Dict[str, Any]:
-        """Create a new order and initialize payment"""
+    @staticmethod
+    def _validate_volume(volume: Any) -> None:
+        if isinstance(volume, bool) or not isinstance(volume, (int, float)) or volume <= 0:
+            raise ValueError("Volume must be a positive number")
 
+    def _build_order(
+        self, user_id: UUID, volume: float, price: PriceQuote
+    ) -> Tuple[Order, Payment]:
+        """
+        Build an order and its pending payment.
+
+        Ids are generated client side, so both rows can be flushed together
+        without reading the order back first.
+        """
+        self._validate_volume(volume)
+
+        total_amount = self.calculate_total_amount(volume, price)
+        order = Order(
+            id=uuid4(),
+            user_id=user_id,
+            volume=volume,
+            total_amount=total_amount,
+            price_id=price.price_id,
+            price_per_liter=price.price_per_liter,
+        )
+        payment = Payment(
+            id=uuid4(),
+            order_id=order.id,
+            amount=total_amount,
+            payment_method="mobile",
+        )
+        return order, payment
+
+    def _order_created(self, order: Order, payment: Payment) -> Dict[str, Any]:
+        return {
+            "message": "Order created successfully",
+            "order_id": str(order.id),
+            "payment_id": str(payment.id),
+            "price_per_liter": order.price_per_liter,
+            "total_amount": order.total_amount,
+        }
+
+    async def create_order(self, user_id: str, order_data: dict) -> Dict[str, Any]:
+        """
+        Create a new order and initialize payment in a single transaction.
+
+        Raises ValueError for an invalid phone number or volume, before any
+        database access.
+        """
         valid_phone_number = self.utilities.validate_phone_number(user_id)
-        
+        self._validate_volume(order_data.get("volume"))
+
         # Check if user exists
-        user = self.session.exec(select(User).where(User.phone_number == valid_phone_number)).first()
+        user_status = await user_status_cache.load(valid_phone_number, self.session)
 
-        if not user:
+        if not user_status["exists"]:
             return {"message": "User not found"}
 
         try:
-            # Create order
-            total_amount = self.calculate_total_amount(order_data.get("volume"))
-
-            order = Order(
-                user_id=user_id,
-                volume=order_data.get("volume"),
-                notes=order_data.get("notes"),
-                total_amount=total_amount,
+            price = await self.price_resolver.current(self.session)
+            order, payment = self._build_order(
+                UUID(user_status["user_id"]), order_data.get("volume"), price
             )
 
-            self.session.add(order)
-            self.session.commit()
-            self.session.refresh(order)
+            self.session.add_all([order, payment])
+            await self.session.commit()
+
+            # The payment worker submits the charge in the background
+            payment_worker.notify()
+            return self._order_created(order, payment)
+
+        except Exception as e:
+            await self.session.rollback()
+            return {"message": f"Failed to create order: {str(e)}"}
 
-            # Initialize payment
-            payment = Payment(
-                order_id=order.id,
-                amount=total_amount,
-                payment_method="mobile",
+    async def create_orders(self, orders_data: List[dict]) -> Dict[str, Any]:
+        """
+        Create many orders in one transaction.
+
+        Raises ValueError naming the first order with an invalid phone
+        number or volume, so a malformed batch is rejected as a whole. Users
+        are then resolved with a single query; an order whose user does not
+        exist is reported per item and does not prevent the others from
+        being saved.
+        """
+        phone_numbers = phone_normalizer.normalize_many(
+            order_data.get("user_id") for order_data in orders_data
+        )
+        for index, (phone_number, order_data) in enumerate(zip(phone_numbers, orders_data)):
+            if phone_number is None:
+                raise ValueError(f"orders[{index}]: Invalid phone number")
+            try:
+                self._validate_volume(order_data.get("volume"))
+            except ValueError as e:
+                raise ValueError(f"orders[{index}]: {e}") from None
+
+        known = {number for number in phone_numbers if number}
+        user_ids = {}
+        if known:
+            rows = await self.session.exec(
+                select(User.phone_number, User.id).where(User.phone_number.in_(known))
             )
+            user_ids = dict(rows.all())
 
-            self.session.add(payment)
-            self.session.commit()
+        # Every order in the batch is billed at the same price
+        price = await self.price_resolver.current(self.session)
 
-            return {
-                "message": "Order created successfully",
-                "order_id": str(order.id),
-                "payment_id": str(payment.id),
-                "total_amount": total_amount,
-            }
+        results: List[Dict[str, Any]] = []
+        new_rows = []
+        for phone_number, order_data in zip(phone_numbers, orders_data):
+            if phone_number not in user_ids:
+                results.append({"message": "User not found"})
+                continue
+            order, payment = self._build_order(
+                user_ids[phone_number], order_data.get("volume"), price
+            )
 
-        except Exception as e:
-            self.session.rollback()
-            return {"message": f"Failed to create order: {str(e)}"}
+            new_rows.extend([order, payment])
+            results.append(self._order_created(order, payment))
 
-    def get_order(self, order_id: UUID) -> Dict[str, Any]:
-        """Get order details"""
-        order = self.session.exec(select(Order).where(Order.id == order_id)).first()
+        if new_rows:
+            try:
+                self.session.add_all(new_rows)
+                await self.session.commit()
+            except Exception as e:
+                await self.session.rollback()
+                return {"message": f"Failed to create orders: {str(e)}"}
+            payment_worker.notify()
 
-        if not order:
-            return {"message": "Order not found"}
+        return {
+            "message": "Orders processed",
+            "created": len(new_rows) // 2,
+            "failed": len(results) - len(new_rows) // 2,
+            "results": results,
+        }
+
+    async def complete_order(self, order_id: UUID) -> Dict[str, Any]:
+        """
+        Mark an order as completed and add it to the sales rollups in the
+        same transaction. Completing an order twice is a no-op.
+        """
+        try:
+            result = await self.session.execute(
+                update(Order)
+                .where(
+                    Order.id == order_id,
+                    Order.status.in_([OrderStatus.PENDING, OrderStatus.CONFIRMED]),
+                )
+                .values(
+                    status=OrderStatus.COMPLETED,
+                    updated_at=utcnow(),
+                )
+            )
+            if result.rowcount == 0:
+                order = await self.session.get(Order, order_id)
+                if not order:
+                    return {"message": "Order not found"}
+                return {"message": f"Order is {order.status.value}"}
 
+            order = await self.session.get(Order, order_id)
+            await sales_aggregator.record_completed(self.session, [order])
+            await self.session.commit()
+            return {"message": "Order completed", "order_id": str(order_id)}
+
+        except Exception as e:
+            await self.session.rollback()
+            return {"message": f"Failed to complete order: {str(e)}"}
+
+    def _serialize_order(self, order: Order) -> Dict[str, Any]:
         return {
             "order_id": str(order.id),
             "user_id": str(order.user_id),
             "volume": order.volume,
+            "price_per_liter": order.price_per_liter,
             "total_amount": order.total_amount,
             "status": order.status,
             "created_at": order.created_at,
             "payment_status": order.payment.status if order.payment else "No payment",
         }
+
+    async def get_order(self, order_id: UUID) -> Dict[str, Any]:
+        """Get order details"""
+        # Join the payment into the same query, async sessions cannot lazy load
+        order = (
+            await self.session.exec(
+                select(Order)
+                .where(Order.id == order_id)
+                .options(joinedload(Order.payment))
+            )
+        ).first()
+
+        if not order:
+            return {"message": "Order not found"}
+
+        return self._serialize_order(order)
+
+    async def list_orders(
+        self, user_id: str, limit: int = 20, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List a user's orders, newest first.
+
+        Uses keyset pagination on (created_at, id) backed by the
+        ix_order_user_id_created_at index, so every page costs the same no
+        matter how far back the user scrolls.
+        """
+        valid_phone_number = self.utilities.validate_phone_number(user_id)
+        user_status = await user_status_cache.load(valid_phone_number, self.session)
+
+        if not user_status["exists"]:
+            return {"message": "User not found"}
+
+        query = (
+            select(Order)
+            .where(Order.user_id == UUID(user_status["user_id"]))
+            .options(joinedload(Order.payment))
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(limit + 1)
+        )
+
+        if cursor:
+            created_at, order_id = decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    Order.created_at < created_at,
+                    and_(Order.created_at == created_at, Order.id < order_id),
+                )
+            )
+
+        orders = (await self.session.exec(query)).all()
+        page = orders[:limit]
+        next_cursor = None
+        if len(orders) > limit:
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+        return {
+            "orders": [self._serialize_order(order) for order in page],
+            "next_cursor": next_cursor,
+        }
+
+
+def encode_cursor(created_at: datetime, order_id: UUID) -> str:
+    """Opaque pagination cursor pointing at the last order of a page"""
+    payload = json.dumps([created_at.isoformat(), str(order_id)]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), UUID(order_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
 from fastapi import status, HTTPException
-from sqlmodel import Session
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.app.api.orders.Orders import OrderService
-from src.database.db_config import get_db
+from src.config.settings import settings
+from src.database.db_config import async_session, get_async_db
 from src.schemas.orders import OrderBase
+from src.tasks.Export import OrderExporter
 
 router = APIRouter(
     prefix="/orders",
@@ -15,23 +21,185 @@ router = APIRouter(
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_order(
     data: dict,
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_async_db),
 ):
 
     user_id = data.get("user_id")
     volume = data.get("volume")
     notes = data.get("notes")
 
+    if not isinstance(user_id, str) or not user_id.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="user_id must be the user's phone number",
+        )
+
     order_service = OrderService(session=session)
     # Process the order data and create the order
-    order = order_service.create_order(
-        user_id=user_id,
-        order_data={
-            "volume": volume,
-            "notes": notes,
-        },
-    )
+    try:
+        order = await order_service.create_order(
+            user_id=user_id,
+            order_data={
+                "volume": volume,
+                "notes": notes,
+            },
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if order.get("message") == "User not found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No user found with this phone number",
+        )
+    if "order_id" not in order:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create order",
+        )
 
     # You can use the OrderService to handle the order creation
     # and payment processing
-    return {"message": "Order created successfully"}
+    return order
+
+
+@router.post("/batch", status_code=status.HTTP_201_CREATED)
+async def create_orders(
+    data: dict,
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create many orders at once, e.g. when a station kiosk uploads orders it
+    queued while offline
+    """
+    orders = data.get("orders")
+    if not isinstance(orders, list) or not orders:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="orders must be a non-empty list",
+        )
+    if len(orders) > settings.ORDER_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.ORDER_BATCH_MAX_SIZE} orders per batch",
+        )
+    if not all(isinstance(order, dict) for order in orders):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each order must be an object",
+        )
+
+    order_service = OrderService(session=session)
+    try:
+        response = await order_service.create_orders(orders)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if "results" not in response:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=response["message"],
+        )
+    return response
+
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def list_orders(
+    user_id: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    List a user's orders newest first, pass next_cursor back to get the
+    following page
+    """
+    order_service = OrderService(session=session)
+    try:
+        response = await order_service.list_orders(
+            user_id=user_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if response.get("message") == "User not found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No user found with this phone number",
+        )
+    return response
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_orders(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+):
+    """
+    Stream orders and their payments as NDJSON or CSV, optionally limited
+    to orders created in [start, end)
+    """
+    try:
+        exporter = OrderExporter(start=start, end=end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def export_body():
+        # The request's session is closed once the handler returns, the
+        # stream needs its own
+        async with async_session() as session:
+            async for chunk in exporter.stream(session, format):
+                yield chunk
+
+    return StreamingResponse(
+        export_body(),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
+
+
+@router.get("/{order_id}", status_code=status.HTTP_200_OK)
+async def get_order(
+    order_id: UUID,
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get an order with its payment status
+    """
+    order_service = OrderService(session=session)
+    response = await order_service.get_order(order_id)
+
+    if response.get("message") == "Order not found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
+        )
+    return response
+
+
+@router.post("/{order_id}/complete", status_code=status.HTTP_200_OK)
+async def complete_order(
+    order_id: UUID,
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Mark an order as completed once the fuel has been dispensed
+    """
+    order_service = OrderService(session=session)
+    response = await order_service.complete_order(order_id)
+
+    if response.get("message") == "Order not found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Order not found"
+        )
+    if response.get("message", "").startswith("Order is "):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=response["message"]
+        )
+    if response.get("message", "").startswith("Failed"):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to complete order",
+        )
+    return response
@@ -0,0 +1,67 @@
+import hmac
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.database.db_config import get_async_db
+from src.tasks.Payments import payment_worker
+from src.tasks.Tasks import Tasks
+
+router = APIRouter(
+    prefix="/payments",
+    tags=["payments"],
+)
+
+
+@router.post("/callback", status_code=status.HTTP_200_OK)
+async def payment_callback(
+    request: Request,
+    token: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_db),
+) -> Dict[str, Any]:
+    """
+    Payment status notifications from the provider.
+
+    Requires PAYMENT_CALLBACK_TOKEN, callbacks are refused while it is unset
+    and the payment worker's polling settles payments instead. The status
+    in the notification is not trusted: the payment is made due and the
+    worker looks the transaction up with the provider, so the callback
+    returns without waiting on the provider. Safe to deliver more than
+    once, only the first final status for a transaction is applied; a
+    success reported after the payment was failed is still checked.
+    """
+    if not settings.PAYMENT_CALLBACK_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment callbacks are disabled",
+        )
+    if not hmac.compare_digest(token or "", settings.PAYMENT_CALLBACK_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token")
+
+    try:
+        payload = await request.json()
+        notified = payment_worker.provider.parse_callback(payload)
+    except (ValueError, AttributeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    queued = await payment_worker.recheck(session, notified.transaction_ref, notified.status)
+    return {"transaction_ref": notified.transaction_ref, "queued": queued}
+
+
+@router.post("/{payment_id}/charge", status_code=status.HTTP_202_ACCEPTED)
+async def charge_payment(
+    payment_id: UUID,
+    session: AsyncSession = Depends(get_async_db),
+) -> Dict[str, Any]:
+    """
+    Queue the mobile money charge for a payment that has not been submitted
+    """
+    if not await Tasks(session).make_payment(str(payment_id)):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Payment is not pending or was already submitted",
+        )
+    return {"message": "Payment queued", "payment_id": str(payment_id)}
@@ -0,0 +1,64 @@
+import hmac
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.database.db_config import get_async_db
+from src.schemas.orders import FuelPriceBase
+from src.schemas.users import FuelPrice
+from src.tasks.Pricing import price_resolver
+
+router = APIRouter(
+    prefix="/prices",
+    tags=["prices"],
+)
+
+
+@router.get("/current", status_code=status.HTTP_200_OK)
+async def current_price(
+    session: AsyncSession = Depends(get_async_db),
+) -> Dict[str, Any]:
+    """
+    Fuel price new orders are billed at
+    """
+    price = await price_resolver.current(session)
+    return price._asdict()
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def list_prices(
+    limit: int = Query(default=50, ge=1, le=500),
+    session: AsyncSession = Depends(get_async_db),
+) -> List[FuelPrice]:
+    """
+    Price versions, most recent first
+    """
+    return await price_resolver.history(session, limit=limit)
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def set_price(
+    data: FuelPriceBase,
+    token: Optional[str] = Header(default=None, alias="X-Admin-Token"),
+    session: AsyncSession = Depends(get_async_db),
+) -> FuelPrice:
+    """
+    Add a price version, effective now or from a future effective_from.
+    Requires ADMIN_TOKEN in the X-Admin-Token header, refused while unset
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Setting prices is disabled",
+        )
+    if not hmac.compare_digest(token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token")
+
+    try:
+        return await price_resolver.set_price(
+            session, data.price_per_liter, effective_from=data.effective_from
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
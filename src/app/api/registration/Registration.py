@@ -1,40 +1,49 @@
 import logging
-import pyotp
-from datetime import datetime, timedelta
-from sqlmodel import Session, select
+from datetime import timedelta
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Dict, Any
 from uuid import UUID
 
+from src.config.settings import settings
+from src.schemas.types import utcnow
 from src.schemas.users import User, UserBase, Verifications
+from src.tasks.Maintenance import deactivate_verifications
+from src.tasks.Outbox import outbox_worker
 from src.tasks.Tasks import Tasks
+from src.utils.cache import user_status_cache
+from src.utils.otp import OTPRateLimitError, OTPStatus, otp_engine
 from src.utils.platenummbers import PlateNumberValidator
 from src.utils.utililities import Utilities
 
+logger = logging.getLogger(__name__)
+
 
 class Registration:
     def __init__(self):
         self.utilities = Utilities()
-        self.otp_expiry_minutes = 10  # OTP valid for 10 minutes
-
-    def _create_verification(
-        self, session: Session, user_id: UUID, phone_number: str, otp: str
-    ) -> Verifications:
-        """Create a new verification record"""
-        verification = Verifications(
-            user_id=user_id,
-            phone_number=phone_number,
-            otp=otp,
-            is_active=True,
-            is_verified=False,
-            created_at=datetime.now().isoformat(),
-            updated_at=datetime.now().isoformat(),
-        )
-        session.add(verification)
-        session.commit()
-        session.refresh(verification)
-        return verification
+        # Lifetime of legacy Verifications rows
+        self.otp_expiry_minutes = settings.OTP_TTL_SECONDS // 60
 
-    def register_user(self, data: dict, session: Session) -> Dict[str, Any]:
+    def normalize_phone_number(self, phone_number: str) -> str:
+        """Normalize to E.164, falling back to the raw value if it does not parse"""
+        try:
+            return self.utilities.validate_phone_number(phone_number)
+        except Exception:
+            return phone_number
+
+    async def get_user_status(
+        self, phone_number: str, session: AsyncSession
+    ) -> Dict[str, Any]:
+        """
+        Get user existence, verification status and id, served from the
+        user status cache when possible
+        """
+        valid_phone_number = self.normalize_phone_number(phone_number)
+        return await user_status_cache.load(valid_phone_number, session)
+
+    async def register_user(self, data: dict, session: AsyncSession) -> Dict[str, Any]:
         """Register a new user and send OTP"""
         phone_number = data.get("phone_number")
         plate_number = data.get("plate_number")
@@ -45,94 +54,111 @@ class Registration:
         valid_phone_number = self.utilities.validate_phone_number(phone_number)
 
         # Check if the user already exists
-        user = session.exec(
-            select(User).where(User.phone_number == valid_phone_number)
+        user = (
+            await session.exec(
+                select(User).where(User.phone_number == valid_phone_number)
+            )
         ).first()
 
         if user:
             return {"message": "User already exists"}
 
-        # Save the user to the database
+        # Issue the OTP first, so a number over its send limit is refused
+        # before a user is created that would never receive a code
+        try:
+            otp = await otp_engine.issue(valid_phone_number)
+        except OTPRateLimitError:
+            return {"message": "Too many OTP requests"}
+
+        # The user and the SMS carrying its OTP are written in one transaction,
+        # so a user never exists without a queued code
         new_user = User(
             phone_number=valid_phone_number,
             plate_number=plate_number,
             is_verified=False,
         )
         session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
-
-        if new_user:
-            # Generate an OTP
-            totp = pyotp.TOTP("base32secret3232")
-            otp = totp.now()
-
-            # Create verification record
-            verification = self._create_verification(
-                session=session,
-                user_id=new_user.id,
-                phone_number=valid_phone_number,
-                otp=otp,
+        task = Tasks(session=session)
+        if not task.queue_sms(
+            phone_number=valid_phone_number, message=f"Hakiki OTP: {otp}"
+        ):
+            await session.rollback()
+            return {"message": "Failed to register user"}
+
+        try:
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        await user_status_cache.invalidate(valid_phone_number)
+        outbox_worker.notify()
+
+        return {
+            "message": "User registered successfully",
+            "user_id": str(new_user.id),
+        }
+
+    async def _mark_verified(
+        self, phone_number: str, session: AsyncSession
+    ) -> Dict[str, Any]:
+        """Persist the verification with a single UPDATE, no read first"""
+        try:
+            result = await session.execute(
+                update(User)
+                .where(User.phone_number == phone_number, User.is_verified == False)
+                .values(is_verified=True, updated_at=utcnow())
             )
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            return {"message": "Verification failed"}
+        await user_status_cache.invalidate(phone_number)
 
-            if verification:
-                # Send the OTP to the user's phone number
-                try:
-                    task = Tasks(session=session)
-                    send_sms = task.send_sms(
-                        phone_number=valid_phone_number,
-                        message=f"Hakiki OTP: {otp}",
-                        user_id=new_user.id,
-                    )
-                except Exception as e:
-                    print(e)
-                    send_sms = False
-
-                if send_sms:
-                    return {
-                        "message": "User registered successfully",
-                        "user_id": str(new_user.id),
-                    }
-
-        return {"message": "Failed to register user"}
-
-    def verify_otp(
-        self, phone_number: str, otp: str, session: Session
+        if result.rowcount == 0:
+            user_status = await user_status_cache.load(phone_number, session)
+            if not user_status["exists"]:
+                return {"message": "User not found"}
+        return {"message": "Verification successful"}
+
+    async def verify_otp(
+        self, phone_number: str, otp: str, session: AsyncSession
     ):
         """Verify OTP for user registration"""
-
-        # debug
-        print("phone_number", phone_number)
-        print("otp", otp)
-
-        # use logging instead of print
-        logging.info(f"phone_number: {phone_number}")
-        logging.info(f"otp: {otp}")
-        
         if not phone_number or not otp:
             raise ValueError("Phone number and OTP are required")
 
         valid_phone_number = self.utilities.validate_phone_number(phone_number)
 
-        # Get the latest verification record for this phone number
-        verification = session.exec(
-            select(Verifications)
-            .where(
-                Verifications.phone_number == valid_phone_number,
-                Verifications.is_active == True,
-                Verifications.is_verified == False,
+        otp_status = await otp_engine.verify(valid_phone_number, otp)
+        if otp_status == OTPStatus.VALID:
+            return await self._mark_verified(valid_phone_number, session)
+        if otp_status == OTPStatus.TOO_MANY_ATTEMPTS:
+            return {"message": "Too many attempts"}
+        if otp_status == OTPStatus.EXPIRED:
+            return {"message": "OTP has expired"}
+        if otp_status == OTPStatus.INVALID:
+            return {"message": "Invalid OTP"}
+
+        # No derived OTP was issued, fall back to codes stored before the switch
+        verification = (
+            await session.exec(
+                select(Verifications)
+                .where(
+                    Verifications.phone_number == valid_phone_number,
+                    Verifications.is_active == True,
+                    Verifications.is_verified == False,
+                )
+                .order_by(Verifications.created_at.desc())
             )
-            .order_by(Verifications.created_at.desc())
         ).first()
 
         if not verification:
             return {"message": "No verification found"}
 
         # Check if OTP has expired (10 minutes)
-        created_at = datetime.fromisoformat(verification.created_at)
-        if datetime.now() - created_at > timedelta(minutes=self.otp_expiry_minutes):
+        if utcnow() - verification.created_at > timedelta(minutes=self.otp_expiry_minutes):
             verification.is_active = False
-            session.commit()
+            await session.commit()
             return {"message": "OTP has expired"}
 
         # Verify OTP
@@ -141,76 +167,60 @@ class Registration:
 
         try:
             # Update user verification status
-            user = session.exec(
-                select(User).where(User.id == verification.user_id)
+            user = (
+                await session.exec(
+                    select(User).where(User.id == verification.user_id)
+                )
             ).first()
             if user:
                 user.is_verified = True
-                user.updated_at = datetime.now().isoformat()
+                user.updated_at = utcnow()
 
                 # Delete the verification record
-                session.delete(verification)
+                await session.delete(verification)
 
                 # Commit all changes in a single transaction
-                session.commit()
+                await session.commit()
+                await user_status_cache.invalidate(user.phone_number)
 
                 return {"message": "Verification successful"}
             else:
                 return {"message": "User not found"}
 
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             return {"message": "Verification failed"}
 
-    def resend_otp(self, phone_number: str, session: Session) -> Dict[str, Any]:
+    async def resend_otp(self, phone_number: str, session: AsyncSession) -> Dict[str, Any]:
         """Resend OTP to user"""
         if not phone_number:
             raise ValueError("Phone number is required")
 
         valid_phone_number = self.utilities.validate_phone_number(phone_number)
 
-        # Get the user
-        user = session.exec(
-            select(User).where(User.phone_number == valid_phone_number)
-        ).first()
-
-        if not user:
+        user_status = await user_status_cache.load(valid_phone_number, session)
+        if not user_status["exists"]:
             return {"message": "User not found"}
 
-        # Generate new OTP
-        totp = pyotp.TOTP("base32secret3232")
-        new_otp = totp.now()
-
-        # Deactivate old verifications
-        old_verifications = session.exec(
-            select(Verifications).where(
-                Verifications.phone_number == valid_phone_number,
-                Verifications.is_active == True,
-            )
-        ).all()
+        # Issuing a new OTP retires the previous one
+        try:
+            new_otp = await otp_engine.issue(valid_phone_number)
+        except OTPRateLimitError:
+            return {"message": "Too many OTP requests"}
 
-        for verification in old_verifications:
-            verification.is_active = False
-            verification.updated_at = datetime.now().isoformat()
+        # Deactivate verifications stored before OTPs were derived
+        await deactivate_verifications(session, valid_phone_number)
 
-        # Create new verification
-        verification = self._create_verification(
-            session=session,
-            user_id=user.id,
-            phone_number=valid_phone_number,
-            otp=new_otp,
-        )
-
-        # Send new OTP
+        # Send new OTP, committed together with the deactivations above
         try:
             task = Tasks(session=session)
-            send_sms = task.send_sms(
+            send_sms = await task.send_sms(
                 phone_number=valid_phone_number,
                 message=f"Hakiki OTP: {new_otp}",
-                user_id=user.id,
+                user_id=user_status["user_id"],
             )
-        except Exception as e:
-            print(e)
+        except Exception:
+            logger.exception("Failed to queue the resent OTP")
             send_sms = False
 
         if send_sms:
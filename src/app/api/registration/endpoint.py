@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
+import logging
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Dict, Any
 from pydantic import BaseModel
 
 from src.app.api.registration.Registration import Registration
-from src.database.db_config import get_db
+from src.database.db_config import get_async_db
 from src.schemas.users import User, UserBase
+from src.utils.ratelimit import RateLimitExceeded, otp_rate_limiter
 from src.utils.utililities import Utilities
 
 
@@ -19,6 +23,8 @@ class ResendOTPRequest(BaseModel):
     phone_number: str
 
 
+logger = logging.getLogger(__name__)
+
 # Initialize router
 router = APIRouter(
     prefix="/registration",
@@ -29,20 +35,46 @@ registration = Registration()
 utils = Utilities()
 
 
+async def otp_rate_limit(request: Request) -> None:
+    """
+    Reject OTP sends over the rate limits, before the endpoint opens a
+    database session
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    phone_number = data.get("phone_number") if isinstance(data, dict) else None
+
+    try:
+        await otp_rate_limiter.check(
+            phone_number=phone_number if isinstance(phone_number, str) else None,
+            client_ip=request.client.host if request.client else None,
+        )
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many OTP requests, please try again later",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
+
 @router.post("/check_user", status_code=status.HTTP_200_OK)
-async def check_user(data: dict, session: Session = Depends(get_db)) -> Dict[str, Any]:
+async def check_user(
+    data: dict, session: AsyncSession = Depends(get_async_db)
+) -> Dict[str, Any]:
     """
     Check if a user with the given phone number exists
     """
-    print(data)
+    logger.debug("check_user payload: %s", data)
 
     phone_number = data.get("chat_id")
 
     try:
-        user = session.exec(
-            select(User).where(User.phone_number == phone_number)
-        ).first()
-        if user:
+        user_status = await registration.get_user_status(
+            phone_number=phone_number, session=session
+        )
+        if user_status["exists"]:
             return {"text": "continue"}
         else:
             return utils.response_buttons(
@@ -59,20 +91,22 @@ async def check_user(data: dict, session: Session = Depends(get_db)) -> Dict[str
         )
 
 
-@router.post("/r", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/r", status_code=status.HTTP_201_CREATED, dependencies=[Depends(otp_rate_limit)]
+)
 async def register_user(
-    data: dict, session: Session = Depends(get_db)
+    data: dict, session: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Register a new user and send initial OTP
     """
-    print(data)
+    logger.debug("register payload: %s", data)
 
     phone_number = data.get("phone_number")
     plate_number = data.get("plate_number")
 
     try:
-        response = registration.register_user(
+        response = await registration.register_user(
             data={"phone_number": phone_number, "plate_number": plate_number},
             session=session,
         )
@@ -81,7 +115,14 @@ async def register_user(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User with this phone number already exists",
             )
-        return
+        if response.get("message") == "Too many OTP requests":
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many OTP requests, please try again later",
+            )
+        return response
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -92,14 +133,14 @@ async def register_user(
 
 
 @router.post("/verify", status_code=status.HTTP_200_OK)
-async def verify_otp(data: dict, session: Session = Depends(get_db)):
+async def verify_otp(data: dict, session: AsyncSession = Depends(get_async_db)):
     """
     Verify OTP for user registration
     """
-    print(data)
+    logger.debug("verify payload: %s", data)
 
     try:
-        response = registration.verify_otp(
+        response = await registration.verify_otp(
             phone_number=data.get("phone_number"),
             otp=data.get("verify_otp"),
             session=session,
@@ -119,6 +160,21 @@ async def verify_otp(data: dict, session: Session = Depends(get_db)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP provided"
             )
+        elif response.get("message") == "Too many attempts":
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please request a new OTP",
+            )
+        elif response.get("message") == "User not found":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No user found with this phone number",
+            )
+        elif response.get("message") == "Verification failed":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to verify OTP",
+            )
 
         return utils.response_buttons(
             text=f"Your account is verified!",
@@ -127,6 +183,8 @@ async def verify_otp(data: dict, session: Session = Depends(get_db)):
                 {"id": "cancel", "title": "Cancel"},
             ],
         )
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -136,15 +194,17 @@ async def verify_otp(data: dict, session: Session = Depends(get_db)):
         )
 
 
-@router.post("/resend-otp", status_code=status.HTTP_200_OK)
+@router.post(
+    "/resend-otp", status_code=status.HTTP_200_OK, dependencies=[Depends(otp_rate_limit)]
+)
 async def resend_otp(
-    resend_data: ResendOTPRequest, session: Session = Depends(get_db)
+    resend_data: ResendOTPRequest, session: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Resend OTP to user's phone number
     """
     try:
-        response = registration.resend_otp(
+        response = await registration.resend_otp(
             phone_number=resend_data.phone_number, session=session
         )
 
@@ -153,8 +213,15 @@ async def resend_otp(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No user found with this phone number",
             )
+        if response.get("message") == "Too many OTP requests":
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many OTP requests, please try again later",
+            )
 
         return response
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -166,26 +233,28 @@ async def resend_otp(
 
 @router.get("/status/{phone_number}", status_code=status.HTTP_200_OK)
 async def check_registration_status(
-    phone_number: str, session: Session = Depends(get_db)
+    phone_number: str, session: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     Check registration status for a phone number
     """
     try:
-        user = session.exec(
-            select(User).where(User.phone_number == phone_number)
-        ).first()
+        user_status = await registration.get_user_status(
+            phone_number=phone_number, session=session
+        )
 
-        if not user:
+        if not user_status["exists"]:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
         return {
             "is_registered": True,
-            "is_verified": user.is_verified,
-            "user_id": str(user.id),
+            "is_verified": user_status["is_verified"],
+            "user_id": user_status["user_id"],
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,17 +1,80 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from src.config.log_config import RequestContextMiddleware, configure_logging
 from src.config.settings import settings
+from src.tasks.Maintenance import verification_cleaner
+from src.tasks.Outbox import outbox_worker
+from src.tasks.Payments import payment_worker
+from src.tasks.SMS import dispatcher
+from src.utils.cache import cache
+from src.utils.idempotency import IdempotencyMiddleware
+from src.utils.metrics import MetricsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await dispatcher.start()
+    workers = []
+    if settings.SMS_OUTBOX_IN_PROCESS:
+        workers.append((outbox_worker, asyncio.create_task(outbox_worker.run())))
+    if settings.PAYMENT_IN_PROCESS:
+        workers.append((payment_worker, asyncio.create_task(payment_worker.run())))
+    if settings.VERIFICATION_CLEANUP_IN_PROCESS:
+        workers.append(
+            (verification_cleaner, asyncio.create_task(verification_cleaner.run()))
+        )
+
+    yield
+
+    for worker, task in workers:
+        worker.stop()
+        await task
+    await dispatcher.aclose()
+    await payment_worker.aclose()
+    await cache.aclose()
+
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application.
+
+    Heavy dependencies (phonenumbers metadata, the SMS and payment HTTP clients)
+    are loaded on first use rather than here, so workers start quickly.
+    """
+    configure_logging()
+
+    # API endpoints
+    from src.app.api.registration.endpoint import router as registration_router
+    from src.app.api.orders.endpoints import router as orders_router
+    from src.app.api.analytics.endpoints import router as analytics_router
+    from src.app.api.pricing.endpoints import router as pricing_router
+    from src.app.api.payments.endpoints import router as payments_router
+    from src.app.api.metrics.endpoints import router as metrics_router
+
+    app = FastAPI(
+        title=settings.NAME,
+        version=settings.VERSION,
+        debug=settings.DEBUG,
+        docs_url="/",
+        lifespan=lifespan,
+    )
 
-# API endpoints
-from src.app.api.registration.endpoint import router as registration_router
-from src.app.api.orders.endpoints import router as orders_router
+    app.include_router(registration_router)
+    app.include_router(orders_router)
+    app.include_router(analytics_router)
+    app.include_router(pricing_router)
+    app.include_router(payments_router)
 
-app = FastAPI(
-    title=settings.NAME,
-    version=settings.VERSION,
-    debug=settings.DEBUG,
-    docs_url="/",
-)
+    # Innermost, so replayed responses are still logged and measured
+    if settings.IDEMPOTENCY_ROUTES:
+        app.add_middleware(IdempotencyMiddleware)
+    app.add_middleware(RequestContextMiddleware)
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+    return app
 
-app.include_router(registration_router)
-app.include_router(orders_router)
 
+app = create_app()
@@ -0,0 +1,224 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from src.config.settings import settings
+
+# Phone numbers as the API handles them: E.164, with or without the +, or local 0...
+PHONE_NUMBER_PATTERN = re.compile(r"(?<![\w.+-])(\+?)\d{6,12}(\d{3})(?![\w.])")
+# A 4-8 digit code following "otp" or "code", e.g. "Hakiki OTP: 123456", "'otp': '123456'"
+OTP_PATTERN = re.compile(r"(?i)((?:otp|code)[\"']?\s*[:=]?\s*[\"']?)(\d{4,8})")
+
+# Attributes every LogRecord has, anything else was passed with extra=.
+# uvicorn adds color_message, its message with ANSI color codes
+RESERVED_ATTRS = set(
+    vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()
+) | {"message", "asctime", "taskName", "color_message"}
+
+
+def _mask_phone_number(match: "re.Match") -> str:
+    plus, last_digits = match.group(1), match.group(2)
+    hidden = len(match.group(0)) - len(plus) - len(last_digits)
+    return f"{plus}{'*' * hidden}{last_digits}"
+
+
+def redact(text: str) -> str:
+    """Mask OTPs and all but the last 3 digits of phone numbers"""
+    text = OTP_PATTERN.sub(r"\1******", text)
+    return PHONE_NUMBER_PATTERN.sub(_mask_phone_number, text)
+
+
+class RequestContext:
+    """Per-request logging state, the sampling decision is made on the first record"""
+
+    __slots__ = ("scope", "sampled")
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.sampled: Optional[bool] = None
+
+    @property
+    def route(self) -> Optional[str]:
+        # Starlette sets scope["route"] once routing has matched
+        route = self.scope.get("route")
+        return getattr(route, "path", None)
+
+
+current_request: ContextVar[Optional[RequestContext]] = ContextVar(
+    "current_log_request", default=None
+)
+
+
+class RequestContextMiddleware:
+    """ASGI middleware making the request available to log filters"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_request.set(RequestContext(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
+
+
+class RouteSampler(logging.Filter):
+    """
+    Keeps a fraction of each request's records below WARNING.
+
+    The decision is made once per request, so a sampled request logs in
+    full and an unsampled one not at all. Records outside a request and
+    warnings or worse are always kept.
+    """
+
+    def __init__(self, default_rate: float = 1.0, route_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.default_rate = default_rate
+        self.route_rates = route_rates or {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        context = current_request.get()
+        if context is None:
+            return True
+
+        if context.sampled is None:
+            rate = self.route_rates.get(context.route, self.default_rate)
+            context.sampled = rate >= 1.0 or random.random() < rate
+        if context.sampled and context.route:
+            record.route = context.route
+        return context.sampled
+
+
+class CallerThreadQueueHandler(QueueHandler):
+    """
+    Puts the record on the queue untouched.
+
+    The stock QueueHandler formats the message in prepare(), i.e. on the
+    request path. Records only travel through an in-process queue, so
+    merging args, formatting and redaction are left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with OTPs and phone numbers redacted"""
+
+    def __init__(self, redact_values: bool = True):
+        super().__init__()
+        self.redact_values = redact_values
+
+    def _clean(self, value: Any) -> Any:
+        if self.redact_values and isinstance(value, str):
+            return redact(value)
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": self._clean(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS:
+                if not isinstance(value, (int, float, bool, type(None))):
+                    value = self._clean(str(value))
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self._clean(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Plain text format for local development, the message redacted like the JSON one"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = redact(record.message)
+        return super().formatMessage(record)
+
+
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_listener: Optional[QueueListener] = None
+
+
+def build_formatter(fmt: Optional[str] = None) -> logging.Formatter:
+    fmt = fmt or settings.LOG_FORMAT
+    if fmt == "json":
+        return JSONFormatter(redact_values=settings.LOG_REDACT)
+    if fmt == "text":
+        text_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        if settings.LOG_REDACT:
+            return RedactingFormatter(text_format)
+        return logging.Formatter(text_format)
+    raise ValueError(f"Unknown log format: {fmt}")
+
+
+def configure_logging() -> None:
+    """
+    Route every record through a queue to a background listener thread.
+
+    The caller only pays for the level check, the sampling filter and a
+    queue put; formatting, redaction and the write to stderr happen on the
+    listener thread. Safe to call more than once.
+
+    Servers must not apply their own logging config afterwards, e.g. run
+    uvicorn with log_config=None, or its handlers come back.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = CallerThreadQueueHandler(log_queue)
+    queue_handler.addFilter(
+        RouteSampler(settings.LOG_SAMPLE_RATE, settings.LOG_ROUTE_SAMPLE_RATES)
+    )
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(build_formatter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+
+    # uvicorn installs its own stream handlers, send its records (including
+    # access logs) through the queue too so they are sampled and redacted
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        for handler in list(uvicorn_logger.handlers):
+            uvicorn_logger.removeHandler(handler)
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
@@ -11,14 +11,125 @@ class Settings(BaseSettings):
     NAME: str = "Filling Station API"
     VERSION: str = "0.1.0"
     DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_REDACT: bool = True  # mask OTPs and phone numbers
+    LOG_SAMPLE_RATE: float = 1.0  # fraction of requests whose INFO/DEBUG records are kept
+    LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = {"/metrics": 0.0}  # by route template
 
     DATABASE_URL: str = "sqlite:///./station.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # derived from DATABASE_URL when unset
+
+    # Connection pool, used for server databases (PostgreSQL, MySQL)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+
+    # SQLite pragmas applied on every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
 
     AFRICASTALKING_API_KEY: str = os.getenv("AFRICASTALKING_API_KEY", "")
     AFRICASTALKING_USERNAME: str = os.getenv("AFRICASTALKING_USERNAME", "")
     SENDER_ID: str = os.getenv("SENDER_ID", "")
 
-    PRICE_PER_LITER: float = 2075.0
+    # SMS dispatch
+    SMS_GATEWAY: str = "africastalking"  # "africastalking" or "fake"
+    SMS_API_URL: str = "https://api.africastalking.com/version1/messaging/bulk"
+    SMS_TIMEOUT_SECONDS: float = 10.0
+    SMS_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    SMS_MAX_CONNECTIONS: int = 20
+    SMS_MAX_CONCURRENCY: int = 20
+    SMS_BATCH_MAX_SIZE: int = 100  # recipients per bulk request
+    SMS_BATCH_LINGER_SECONDS: float = 0.05
+
+    # SMS outbox worker
+    SMS_OUTBOX_IN_PROCESS: bool = True  # drain the outbox from the API process
+    SMS_OUTBOX_BATCH_SIZE: int = 100
+    SMS_OUTBOX_POLL_SECONDS: float = 1.0
+    SMS_OUTBOX_MAX_ATTEMPTS: int = 8
+    SMS_OUTBOX_BACKOFF_SECONDS: float = 2.0
+    SMS_OUTBOX_BACKOFF_MAX_SECONDS: float = 600.0
+    SMS_OUTBOX_LEASE_SECONDS: float = 60.0
+
+    # Mobile money payments
+    PAYMENT_PROVIDER: str = "africastalking"  # "africastalking" or "fake"
+    PAYMENT_CHECKOUT_URL: str = "https://payments.africastalking.com/mobile/checkout/request"
+    PAYMENT_QUERY_URL: str = "https://payments.africastalking.com/query/transaction/find"
+    PAYMENT_FETCH_URL: str = "https://payments.africastalking.com/query/transaction/fetch"
+    PAYMENT_PRODUCT_NAME: str = os.getenv("PAYMENT_PRODUCT_NAME", "")
+    PAYMENT_CURRENCY_CODE: str = "KES"
+    # Shared secret for /payments/callback, callbacks are refused while unset
+    PAYMENT_CALLBACK_TOKEN: str = os.getenv("PAYMENT_CALLBACK_TOKEN", "")
+    PAYMENT_TIMEOUT_SECONDS: float = 10.0
+    PAYMENT_MAX_CONCURRENCY: int = 20
+
+    # Payment worker
+    PAYMENT_IN_PROCESS: bool = True  # run the payment worker in the API process
+    PAYMENT_BATCH_SIZE: int = 100
+    PAYMENT_POLL_SECONDS: float = 1.0
+    PAYMENT_MAX_ATTEMPTS: int = 10  # charge submissions and status checks
+    PAYMENT_BACKOFF_SECONDS: float = 5.0
+    PAYMENT_BACKOFF_MAX_SECONDS: float = 300.0
+    PAYMENT_LEASE_SECONDS: float = 60.0
+
+    # Shared cache
+    CACHE_BACKEND: str = "memory"  # "memory" or "redis"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "station:"
+    CACHE_MAX_ENTRIES: int = 100000  # memory backend only
+
+    USER_CACHE_TTL_SECONDS: float = 300.0
+    PHONE_CACHE_MAX_ENTRIES: int = 50000
+
+    # One-time passwords, codes are derived from OTP_SECRET and never stored
+    OTP_SECRET: str = os.getenv("OTP_SECRET", "")
+    OTP_DIGITS: int = 6
+    OTP_TTL_SECONDS: int = 600
+    OTP_STEP_SECONDS: int = 60
+    OTP_MAX_ATTEMPTS: int = 5  # wrong codes per issued OTP
+    OTP_MAX_SENDS: int = 5  # OTPs per phone number per send window
+    OTP_SEND_WINDOW_SECONDS: int = 3600
+
+    # Legacy Verifications rows: expired after OTP_TTL_SECONDS, deleted after retention
+    VERIFICATION_CLEANUP_IN_PROCESS: bool = True
+    VERIFICATION_CLEANUP_INTERVAL_SECONDS: float = 3600.0
+    VERIFICATION_CLEANUP_CHUNK_SIZE: int = 5000
+    VERIFICATION_RETENTION_SECONDS: int = 604800  # 7 days
+
+    # Token buckets in front of the endpoints that send OTPs, a zero burst disables one.
+    # Webhooks all arrive from the chatbot platform, so the per-IP bucket is generous
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "cache"  # "memory" (per process) or "cache" (follows CACHE_BACKEND)
+    RATE_LIMIT_MAX_BUCKETS: int = 100000  # memory backend only
+    RATE_LIMIT_OTP_PHONE_BURST: int = 3
+    RATE_LIMIT_OTP_PHONE_PER_MINUTE: float = 1.0
+    RATE_LIMIT_OTP_IP_BURST: int = 120
+    RATE_LIMIT_OTP_IP_PER_MINUTE: float = 600.0
+    RATE_LIMIT_OTP_GLOBAL_BURST: int = 200
+    RATE_LIMIT_OTP_GLOBAL_PER_MINUTE: float = 1200.0
+
+    # Retried webhooks replay the stored response instead of running again
+    IDEMPOTENCY_ROUTES: List[str] = ["POST /registration/r", "POST /orders/"]
+    IDEMPOTENCY_HEADER: str = "Idempotency-Key"
+    IDEMPOTENCY_BODY_FIELDS: List[str] = ["message_id"]  # used when the header is absent
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0  # how long a response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0  # claim lifetime if a request never finishes
+    IDEMPOTENCY_WAIT_SECONDS: float = 15.0  # a duplicate waits this long for the first
+
+    # Shared secret for admin endpoints (setting prices), refused while unset
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    PRICE_PER_LITER: float = 2075.0  # used until a price is set in fuel_price
+    PRICE_CACHE_TTL_SECONDS: float = 5.0
+    ORDER_BATCH_MAX_SIZE: int = 500
+    EXPORT_YIELD_PER: int = 1000  # rows fetched per round-trip when exporting
+
+    # Prometheus-style metrics at /metrics, per process
+    METRICS_ENABLED: bool = True
 
 
 settings = Settings()
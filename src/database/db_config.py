@@ -1,8 +1,110 @@
 # Setup a sqlmodel database connection
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.config.settings import settings
+from src.utils.metrics import record_query
+
+# Async drivers used by the API for each sync database URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Derive the async driver URL from a sync database URL"""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def get_engine_options(url: str) -> Dict[str, Any]:
+    """Engine keyword arguments for the given database URL"""
+    options: Dict[str, Any] = {"echo": settings.DEBUG}
+
+    if is_sqlite(url):
+        # Connections move between threads in the threadpool and the async driver
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_pre_ping=True,
+        )
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Apply SQLite pragmas on connect.
+
+    WAL lets readers proceed while a writer commits, and busy_timeout makes
+    writers wait for the lock instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_started = time.perf_counter()
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Record the query for /metrics, against the current request if any"""
+    record_query(time.perf_counter() - context._query_started)
+
+
+def configure_engine(db_engine: Engine, url: str) -> None:
+    """Attach the connect and query event hooks to a (sync) engine"""
+    if is_sqlite(url):
+        event.listen(db_engine, "connect", set_sqlite_pragmas)
+    if settings.METRICS_ENABLED:
+        event.listen(db_engine, "before_cursor_execute", start_query_timer)
+        event.listen(db_engine, "after_cursor_execute", stop_query_timer)
+
+
+def create_db_engine(url: str) -> Engine:
+    """Build a sync engine configured from settings"""
+    db_engine = create_engine(url, **get_engine_options(url))
+    configure_engine(db_engine, url)
+    return db_engine
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """Build an async engine configured from settings"""
+    db_engine = create_async_engine(url, **get_engine_options(url))
+    configure_engine(db_engine.sync_engine, url)
+    return db_engine
+
+
+# Sync engine, used by Alembic and command line tools
+engine = create_db_engine(settings.DATABASE_URL)
+
+# Async engine, used by the API so queries never block the event loop
+async_engine = create_async_db_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL)
+)
+async_session = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 def create_db_and_tables():
@@ -15,3 +117,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with async_session() as db:
+        yield db
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from sqlmodel import Field, SQLModel
 from enum import Enum
@@ -17,6 +18,11 @@ class PaymentStatus(str, Enum):
     REFUNDED = "refunded"
 
 
+class FuelPriceBase(SQLModel):
+    price_per_liter: float = Field(gt=0)  # Price in KES
+    effective_from: Optional[datetime] = Field(default=None)  # now if unset, naive is UTC
+
+
 class OrderBase(SQLModel):
     volume: float = Field(gt=0)  # Volume in liters
 
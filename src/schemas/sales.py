@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+from src.schemas.types import updated_at_field
+
+
+class SalesRollupBase(SQLModel):
+    liters: float = Field(default=0.0)
+    revenue: float = Field(default=0.0)  # Sum of order total_amount
+    orders: int = Field(default=0)
+    updated_at: datetime = updated_at_field()
+
+
+class SalesDaily(SalesRollupBase, table=True):
+    """Completed order totals per UTC day (YYYY-MM-DD)"""
+
+    __tablename__ = "sales_daily"
+
+    day: str = Field(primary_key=True, max_length=10)
+
+
+class SalesHourly(SalesRollupBase, table=True):
+    """Completed order totals per UTC hour (YYYY-MM-DDTHH)"""
+
+    __tablename__ = "sales_hourly"
+
+    hour: str = Field(primary_key=True, max_length=13)
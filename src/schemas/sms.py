@@ -1,4 +1,14 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+
 from pydantic import BaseModel
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+from src.schemas.types import created_at_field, updated_at_field
+
 
 class RecipientResponseData(BaseModel):
     statusCode: int
@@ -9,4 +19,37 @@ class RecipientResponseData(BaseModel):
 
 class SMSMessageResponseData(BaseModel):
     Message: str
-    Recipients: list[RecipientResponseData]
\ No newline at end of file
+    Recipients: list[RecipientResponseData]
+
+
+class SMSStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class OutboundSMS(SQLModel, table=True):
+    """Outbox row for an SMS waiting to be delivered by the worker"""
+
+    __tablename__ = "sms_outbox"
+    __table_args__ = (
+        Index("ix_sms_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
+    phone_number: str = Field(max_length=13)
+    message: str
+    status: SMSStatus = Field(default=SMSStatus.PENDING)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = created_at_field()
+    claim_token: Optional[str] = Field(default=None, max_length=32)
+
+    # Delivery details reported by the gateway
+    status_code: Optional[int] = Field(default=None)
+    message_id: Optional[str] = Field(default=None)
+    cost: Optional[str] = Field(default=None)
+    last_error: Optional[str] = Field(default=None)
+
+    created_at: datetime = created_at_field()
+    updated_at: datetime = updated_at_field()
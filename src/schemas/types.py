@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, func
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import Field
+
+
+def utcnow() -> datetime:
+    """The current time, timezone-aware in UTC"""
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Convert to UTC, naive datetimes are taken to already be UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    Timezone-aware timestamp stored in UTC.
+
+    Maps to TIMESTAMP WITH TIME ZONE where the database has one. SQLite has
+    no timezone support, so values are stored as naive UTC and the tzinfo
+    is put back on read.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is None:
+            return None
+        value = as_utc(value)
+        if dialect.name == "sqlite":
+            value = value.replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is None:
+            return None
+        return as_utc(value)
+
+
+def created_at_field(index: bool = False) -> Any:
+    """NOT NULL timestamp set to the insert time, also by the database"""
+    return Field(
+        default_factory=utcnow,
+        index=index,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": func.now()},
+    )
+
+
+def updated_at_field() -> Any:
+    """NOT NULL timestamp refreshed on every UPDATE that does not set it"""
+    return Field(
+        default_factory=utcnow,
+        sa_type=UTCDateTime,
+        sa_column_kwargs={"server_default": func.now(), "onupdate": utcnow},
+    )
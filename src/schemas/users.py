@@ -1,14 +1,17 @@
 from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 from uuid import UUID, uuid4
 
 from src.schemas.orders import (
+    FuelPriceBase,
     OrderBase,
     OrderStatus,
     PaymentBase,
     PaymentStatus,
 )
+from src.schemas.types import UTCDateTime, created_at_field, updated_at_field, utcnow
 
 
 class UserBase(SQLModel):
@@ -25,18 +28,37 @@ class VerificationsBase(SQLModel):
     phone_number: Optional[str] = Field(max_length=13)
     is_verified: bool = False
     is_active: bool = True
-    created_at: Optional[str] = Field(default=datetime.now().isoformat())
-    updated_at: Optional[str] = Field(default=datetime.now().isoformat())
+    created_at: datetime = created_at_field()
+    updated_at: datetime = updated_at_field()
+
+
+class FuelPrice(FuelPriceBase, table=True):
+    """A fuel price version, in force from effective_from until the next one"""
+
+    __tablename__ = "fuel_price"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    effective_from: datetime = created_at_field(index=True)
+    created_at: datetime = created_at_field()
 
 
 class Order(OrderBase, table=True):
+    __table_args__ = (
+        # Serves keyset pagination of a user's order history
+        Index("ix_order_user_id_created_at", "user_id", "created_at", "id"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
     user_id: UUID = Field(foreign_key="user.id")
     status: OrderStatus = Field(default=OrderStatus.PENDING)
     total_amount: float = Field(default=0.0)  # Total amount in KES
 
-    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    # Price version the order was billed at
+    price_id: Optional[int] = Field(default=None, foreign_key="fuel_price.id")
+    price_per_liter: Optional[float] = Field(default=None)
+
+    created_at: datetime = created_at_field(index=True)
+    updated_at: datetime = updated_at_field()
 
     # Relationships
     user: "User" = Relationship(back_populates="orders")
@@ -48,15 +70,32 @@ class Order(OrderBase, table=True):
 
 
 class Payment(PaymentBase, table=True):
+    __table_args__ = (
+        # Serves the payment worker's due payment lookup
+        Index("ix_payment_status_next_check_at", "status", "next_check_at"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
-    order_id: UUID = Field(foreign_key="order.id")
+    order_id: UUID = Field(foreign_key="order.id", index=True)
     status: PaymentStatus = Field(default=PaymentStatus.PENDING)
-
-    payment_date: Optional[str] = Field(
-        default=None
+    transaction_ref: Optional[str] = Field(default=None, unique=True)
+
+    # Charge submission and status polling by the payment worker
+    attempts: int = Field(default=0)
+    next_check_at: Optional[datetime] = Field(
+        default_factory=utcnow, sa_type=UTCDateTime
+    )  # None once settled
+    claim_token: Optional[str] = Field(default=None, max_length=32)
+    failure_reason: Optional[str] = Field(default=None)
+    submitted_at: Optional[datetime] = Field(
+        default=None, sa_type=UTCDateTime
+    )  # Set before the first charge is sent to the provider
+
+    payment_date: Optional[datetime] = Field(
+        default=None, sa_type=UTCDateTime
     )  # Will be set when payment is completed
-    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
-    updated_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+    created_at: datetime = created_at_field()
+    updated_at: datetime = updated_at_field()
 
     # Relationships
     order: Order = Relationship(back_populates="payment")
@@ -68,11 +107,12 @@ class Payment(PaymentBase, table=True):
 
 class User(UserBase, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
+    phone_number: Optional[str] = Field(max_length=13, unique=True, index=True)
     otp: Optional[str] = None
     is_active: bool = True
     is_verified: bool = False
-    created_at: Optional[str] = Field(default=datetime.now().isoformat())
-    updated_at: Optional[str] = Field(default=datetime.now().isoformat())
+    created_at: datetime = created_at_field()
+    updated_at: datetime = updated_at_field()
 
     # Relationship to Verifications
     verifications: List["Verifications"] = Relationship(
@@ -86,6 +126,19 @@ class User(UserBase, table=True):
 
 
 class Verifications(VerificationsBase, table=True):
+    __table_args__ = (
+        # Serves the active verification lookup in Registration.verify_otp
+        Index(
+            "ix_verifications_active_lookup",
+            "phone_number",
+            "is_active",
+            "is_verified",
+            "created_at",
+        ),
+        # Serves the chunked expiry and deletion in VerificationCleaner
+        Index("ix_verifications_is_active_created_at", "is_active", "created_at"),
+    )
+
     user_id: UUID = Field(foreign_key="user.id")
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
 
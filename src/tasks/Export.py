@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.schemas.types import as_utc
+from src.schemas.users import Order, Payment
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+EXPORT_COLUMNS = [
+    Order.id.label("order_id"),
+    Order.user_id.label("user_id"),
+    Order.volume.label("volume"),
+    Order.price_id.label("price_id"),
+    Order.price_per_liter.label("price_per_liter"),
+    Order.total_amount.label("total_amount"),
+    Order.status.label("order_status"),
+    Order.created_at.label("created_at"),
+    Order.updated_at.label("updated_at"),
+    Payment.id.label("payment_id"),
+    Payment.amount.label("payment_amount"),
+    Payment.payment_method.label("payment_method"),
+    Payment.status.label("payment_status"),
+    Payment.transaction_ref.label("transaction_ref"),
+    Payment.payment_date.label("payment_date"),
+]
+
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date/datetime filter, naive values are taken as UTC"""
+    if not value:
+        return None
+    try:
+        return as_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}, expected ISO format e.g. 2026-10-01")
+
+
+class OrderExporter:
+    """
+    Streams orders joined with their payments for reconciliation.
+
+    Rows are read as plain column tuples in chunks of yield_per, so memory
+    stays flat whatever the size of the range being exported.
+    """
+
+    def __init__(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        yield_per: Optional[int] = None,
+    ):
+        self.start = parse_date(start)
+        self.end = parse_date(end)
+        self.yield_per = yield_per or settings.EXPORT_YIELD_PER
+
+    def query(self):
+        query = (
+            select(*EXPORT_COLUMNS)
+            .outerjoin(Payment, Payment.order_id == Order.id)
+            .order_by(Order.created_at, Order.id)
+            .execution_options(yield_per=self.yield_per)
+        )
+        if self.start:
+            query = query.where(Order.created_at >= self.start)
+        if self.end:
+            query = query.where(Order.created_at < self.end)
+        return query
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        record = {}
+        for field, value in zip(EXPORT_FIELDS, row):
+            if isinstance(value, Enum):
+                value = value.value
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, UUID):
+                value = str(value)
+            record[field] = value
+        return record
+
+    async def records(self, session: AsyncSession) -> AsyncIterator[Dict[str, Any]]:
+        result = await session.stream(self.query())
+        async for row in result:
+            yield self._to_record(row)
+
+    def iter_records(self, session: Session) -> Iterator[Dict[str, Any]]:
+        for row in session.execute(self.query()):
+            yield self._to_record(row)
+
+    async def stream(
+        self, session: AsyncSession, fmt: str, lines_per_chunk: int = 500
+    ) -> AsyncIterator[str]:
+        """Yield the export as NDJSON or CSV, a few hundred lines per chunk"""
+        formatter = RecordFormatter(fmt)
+        lines = [formatter.header()] if fmt == "csv" else []
+        async for record in self.records(session):
+            lines.append(formatter.format(record))
+            if len(lines) >= lines_per_chunk:
+                yield "".join(lines)
+                lines.clear()
+        if lines:
+            yield "".join(lines)
+
+    def iter_lines(self, session: Session, fmt: str) -> Iterator[str]:
+        formatter = RecordFormatter(fmt)
+        header = formatter.header()
+        if header:
+            yield header
+        for record in self.iter_records(session):
+            yield formatter.format(record)
+
+
+class RecordFormatter:
+    def __init__(self, fmt: str):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.fmt = fmt
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _csv_line(self, values) -> str:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._writer.writerow(values)
+        return self._buffer.getvalue()
+
+    def header(self) -> Optional[str]:
+        return self._csv_line(EXPORT_FIELDS) if self.fmt == "csv" else None
+
+    def format(self, record: Dict[str, Any]) -> str:
+        if self.fmt == "csv":
+            return self._csv_line(record[field] for field in EXPORT_FIELDS)
+        return json.dumps(record) + "\n"
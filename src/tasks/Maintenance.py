@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.database.db_config import async_session
+from src.schemas.types import utcnow
+from src.schemas.users import Verifications
+from src.tasks.Worker import PollingWorker
+
+
+async def deactivate_verifications(session: AsyncSession, phone_number: str) -> int:
+    """Deactivate every active verification of a number in one UPDATE, the caller commits"""
+    result = await session.execute(
+        update(Verifications)
+        .where(
+            Verifications.phone_number == phone_number,
+            Verifications.is_active == True,
+        )
+        .values(is_active=False, updated_at=utcnow())
+    )
+    return result.rowcount
+
+
+class VerificationCleaner(PollingWorker):
+    """
+    Expires and deletes stale Verifications rows in chunks.
+
+    Each chunk reads up to chunk_size ids with a LIMITed query on
+    ix_verifications_is_active_created_at, then runs one set-based UPDATE
+    or DELETE over those ids (MySQL rejects LIMIT inside an IN subquery),
+    committed on its own so writers are never locked out for long. The worker loops
+    straight away while chunks come back full and otherwise sleeps until
+    the next interval.
+    """
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        interval: Optional[float] = None,
+        session_factory: Optional[async_sessionmaker] = None,
+    ):
+        super().__init__(
+            batch_size=chunk_size or settings.VERIFICATION_CLEANUP_CHUNK_SIZE,
+            poll_interval=interval or settings.VERIFICATION_CLEANUP_INTERVAL_SECONDS,
+        )
+        self.session_factory = session_factory or async_session
+        self.ttl = settings.OTP_TTL_SECONDS
+        self.retention = settings.VERIFICATION_RETENTION_SECONDS
+
+    @staticmethod
+    def _cutoff(seconds: float) -> datetime:
+        return utcnow() - timedelta(seconds=seconds)
+
+    async def _stale_ids(
+        self, session: AsyncSession, is_active: bool, older_than: float
+    ) -> List[UUID]:
+        """Ids of one chunk of rows, read first so the write works on every backend"""
+        rows = await session.execute(
+            select(Verifications.id)
+            .where(
+                Verifications.is_active == is_active,
+                Verifications.created_at < self._cutoff(older_than),
+            )
+            .limit(self.batch_size)
+        )
+        return list(rows.scalars())
+
+    async def expire_chunk(self, session: AsyncSession) -> int:
+        """Deactivate one chunk of active rows older than the OTP lifetime"""
+        ids = await self._stale_ids(session, True, self.ttl)
+        if not ids:
+            return 0
+        result = await session.execute(
+            update(Verifications)
+            .where(Verifications.id.in_(ids), Verifications.is_active == True)
+            .values(is_active=False, updated_at=utcnow())
+        )
+        await session.commit()
+        return result.rowcount
+
+    async def delete_chunk(self, session: AsyncSession) -> int:
+        """Delete one chunk of inactive rows older than the retention period"""
+        ids = await self._stale_ids(session, False, self.retention)
+        if not ids:
+            return 0
+        result = await session.execute(
+            delete(Verifications).where(Verifications.id.in_(ids))
+        )
+        await session.commit()
+        return result.rowcount
+
+    async def cleanup_once(self) -> Tuple[int, int]:
+        """Expire and delete one chunk each, returns (expired, deleted)"""
+        async with self.session_factory() as session:
+            expired = await self.expire_chunk(session)
+            deleted = await self.delete_chunk(session)
+        if expired or deleted:
+            self.logger.info("Verifications cleanup: %d expired, %d deleted", expired, deleted)
+        return expired, deleted
+
+    async def drain_once(self) -> int:
+        return max(await self.cleanup_once())
+
+    async def cleanup(self) -> Dict[str, int]:
+        """Run chunks until nothing is left to expire or delete"""
+        totals = {"expired": 0, "deleted": 0}
+        while True:
+            expired, deleted = await self.cleanup_once()
+            totals["expired"] += expired
+            totals["deleted"] += deleted
+            if max(expired, deleted) < self.batch_size:
+                return totals
+
+
+verification_cleaner = VerificationCleaner()
@@ -0,0 +1,177 @@
+import asyncio
+import random
+from datetime import timedelta
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.database.db_config import async_session
+from src.schemas.sms import OutboundSMS, RecipientResponseData, SMSStatus
+from src.schemas.types import utcnow
+from src.tasks.SMS import SMSBatcher, batcher, dispatcher, is_delivered
+from src.tasks.Worker import PollingWorker
+
+# Africa's Talking status codes that will never succeed on retry
+PERMANENT_FAILURE_CODES = {403, 404, 406}
+
+DUE_STATUSES = [SMSStatus.PENDING, SMSStatus.SENDING]
+
+
+class OutboxWorker(PollingWorker):
+    """
+    Drains the sms_outbox table in batches.
+
+    Rows are claimed with a lease (status SENDING + next_attempt_at in the
+    future) so several workers can share the table and a crashed worker's
+    rows become due again once the lease runs out.
+    """
+
+    def __init__(self, sms_batcher: Optional[SMSBatcher] = None):
+        super().__init__(
+            batch_size=settings.SMS_OUTBOX_BATCH_SIZE,
+            poll_interval=settings.SMS_OUTBOX_POLL_SECONDS,
+        )
+        self.batcher = sms_batcher or batcher
+        self.max_attempts = settings.SMS_OUTBOX_MAX_ATTEMPTS
+        self.lease_seconds = settings.SMS_OUTBOX_LEASE_SECONDS
+
+    def backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt number"""
+        delay = settings.SMS_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+        delay = min(delay, settings.SMS_OUTBOX_BACKOFF_MAX_SECONDS)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _claim_batch(self) -> List[OutboundSMS]:
+        """Lease a batch of due messages to this worker"""
+        now = utcnow()
+        token = uuid4().hex
+
+        async with async_session() as session:
+            due_ids = (
+                await session.exec(
+                    select(OutboundSMS.id)
+                    .where(
+                        OutboundSMS.status.in_(DUE_STATUSES),
+                        OutboundSMS.next_attempt_at <= now,
+                    )
+                    .order_by(OutboundSMS.next_attempt_at)
+                    .limit(self.batch_size)
+                )
+            ).all()
+            if not due_ids:
+                return []
+
+            await session.execute(
+                update(OutboundSMS)
+                .where(
+                    OutboundSMS.id.in_(due_ids),
+                    OutboundSMS.status.in_(DUE_STATUSES),
+                    OutboundSMS.next_attempt_at <= now,
+                )
+                .values(
+                    status=SMSStatus.SENDING,
+                    claim_token=token,
+                    next_attempt_at=now + timedelta(seconds=self.lease_seconds),
+                    updated_at=now,
+                )
+            )
+            await session.commit()
+
+            messages = (
+                await session.exec(
+                    select(OutboundSMS).where(OutboundSMS.claim_token == token)
+                )
+            ).all()
+            session.expunge_all()
+            return list(messages)
+
+    async def _record_result(
+        self,
+        session: AsyncSession,
+        message: OutboundSMS,
+        recipient: Optional[RecipientResponseData],
+        error: Optional[str] = None,
+    ) -> None:
+        """Persist the outcome of one delivery attempt"""
+        now = utcnow()
+        attempts = message.attempts + 1
+        values = {
+            "attempts": attempts,
+            "claim_token": None,
+            "updated_at": now,
+        }
+
+        if recipient is not None:
+            values.update(
+                status_code=recipient.statusCode,
+                message_id=recipient.messageId,
+                cost=recipient.cost,
+            )
+
+        if recipient is not None and is_delivered(recipient):
+            values.update(status=SMSStatus.SENT, last_error=None)
+        elif recipient is not None and recipient.statusCode in PERMANENT_FAILURE_CODES:
+            values.update(status=SMSStatus.FAILED, last_error=recipient.status)
+        elif attempts >= self.max_attempts:
+            values.update(
+                status=SMSStatus.FAILED,
+                last_error=error or (recipient.status if recipient else "Unknown error"),
+            )
+        else:
+            values.update(
+                status=SMSStatus.PENDING,
+                next_attempt_at=now + timedelta(seconds=self.backoff(attempts)),
+                last_error=error or (recipient.status if recipient else "Unknown error"),
+            )
+
+        # Only the worker holding the lease may record the result
+        await session.execute(
+            update(OutboundSMS)
+            .where(
+                OutboundSMS.id == message.id,
+                OutboundSMS.claim_token == message.claim_token,
+            )
+            .values(**values)
+        )
+
+    async def _record_results(self, results: list) -> None:
+        async with async_session() as session:
+            for message, recipient, error in results:
+                await self._record_result(session, message, recipient, error)
+            await session.commit()
+
+    async def _deliver(self, message: OutboundSMS):
+        recipient = await self.batcher.send(message.phone_number, message.message)
+        if recipient is None:
+            return message, None, "No gateway result for recipient"
+        return message, recipient, None
+
+    async def drain_once(self) -> int:
+        """Send one batch of due messages, returns the number processed"""
+        messages = await self._claim_batch()
+        if not messages:
+            return 0
+
+        # Messages sharing the same text go out as one bulk request
+        results = await asyncio.gather(*(self._deliver(message) for message in messages))
+        await self._record_results(results)
+
+        sent = sum(1 for _, recipient, _ in results if recipient and is_delivered(recipient))
+        self.logger.info("Outbox batch processed: %d/%d sent", sent, len(messages))
+        return len(messages)
+
+
+outbox_worker = OutboxWorker()
+
+
+async def run_worker() -> None:
+    """Entry point for a standalone outbox worker process"""
+    await dispatcher.start()
+    try:
+        await outbox_worker.run()
+    finally:
+        await dispatcher.aclose()
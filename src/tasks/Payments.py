@@ -0,0 +1,621 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import case, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.database.db_config import async_session
+from src.schemas.orders import OrderStatus, PaymentStatus
+from src.schemas.types import utcnow
+from src.schemas.users import Order, Payment, User
+from src.tasks.Worker import PollingWorker
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class PaymentProviderError(Exception):
+    """Raised by providers when a request to the provider fails"""
+
+
+class PaymentConfigError(PaymentProviderError):
+    """The provider refused our credentials, retrying will not help"""
+
+
+class PaymentResult(NamedTuple):
+    transaction_ref: Optional[str]
+    status: PaymentStatus  # PENDING while the customer has not confirmed
+    detail: Optional[str] = None
+
+
+# Africa's Talking transaction statuses that are still in progress
+PROVIDER_PENDING_STATUSES = {"PendingConfirmation", "PendingValidation", "Queued", "Received"}
+
+
+def provider_status(status: Optional[str]) -> PaymentStatus:
+    """Map an Africa's Talking transaction status to a PaymentStatus"""
+    if status == "Success":
+        return PaymentStatus.PAID
+    if status in PROVIDER_PENDING_STATUSES:
+        return PaymentStatus.PENDING
+    return PaymentStatus.FAILED
+
+
+class PaymentProvider:
+    """Base class for mobile money providers used by the payment worker"""
+
+    @property
+    def configured(self) -> bool:
+        """Whether the settings needed to charge customers are present"""
+        return True
+
+    async def charge(self, payment_id: UUID, phone_number: str, amount: float) -> PaymentResult:
+        """Ask the customer to pay, usually by a prompt on their phone"""
+        raise NotImplementedError
+
+    async def check(self, transaction_ref: str) -> PaymentResult:
+        """Look up the current status of a charge"""
+        raise NotImplementedError
+
+    async def find(
+        self, payment_id: UUID, phone_number: str, since: datetime
+    ) -> Optional[PaymentResult]:
+        """
+        Look up a charge submitted for a payment since a time, None if the
+        provider has none. Used when a charge may have been accepted without
+        its response reaching the worker
+        """
+        raise NotImplementedError
+
+    def parse_callback(self, payload: Dict[str, Any]) -> PaymentResult:
+        """Read a status notification posted to the payments callback"""
+        transaction_ref = payload.get("transactionId")
+        if not transaction_ref:
+            raise ValueError("Callback is missing transactionId")
+        return PaymentResult(
+            transaction_ref=transaction_ref,
+            status=provider_status(payload.get("status")),
+            detail=payload.get("description"),
+        )
+
+    async def aclose(self) -> None:
+        pass
+
+
+class AfricasTalkingPayments(PaymentProvider):
+    """Africa's Talking mobile checkout over a pooled keep-alive client"""
+
+    def __init__(self, client: Optional["httpx.AsyncClient"] = None):
+        import httpx
+
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.PAYMENT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.PAYMENT_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.PAYMENT_MAX_CONCURRENCY,
+            ),
+            headers={
+                "Accept": "application/json",
+                "apiKey": settings.AFRICASTALKING_API_KEY,
+            },
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(
+            settings.AFRICASTALKING_API_KEY
+            and settings.AFRICASTALKING_USERNAME
+            and settings.PAYMENT_PRODUCT_NAME
+        )
+
+    async def _request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        import httpx
+
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (401, 403):
+                raise PaymentConfigError(str(e)) from e
+            raise PaymentProviderError(str(e)) from e
+        except (httpx.HTTPError, ValueError) as e:
+            raise PaymentProviderError(str(e)) from e
+
+    async def charge(self, payment_id: UUID, phone_number: str, amount: float) -> PaymentResult:
+        data = await self._request(
+            "POST",
+            settings.PAYMENT_CHECKOUT_URL,
+            json={
+                "username": settings.AFRICASTALKING_USERNAME,
+                "productName": settings.PAYMENT_PRODUCT_NAME,
+                "phoneNumber": phone_number,
+                "currencyCode": settings.PAYMENT_CURRENCY_CODE,
+                "amount": amount,
+                "metadata": {"payment_id": str(payment_id)},
+            },
+        )
+        return PaymentResult(
+            transaction_ref=data.get("transactionId"),
+            status=provider_status(data.get("status")),
+            detail=data.get("description"),
+        )
+
+    async def check(self, transaction_ref: str) -> PaymentResult:
+        data = await self._request(
+            "GET",
+            settings.PAYMENT_QUERY_URL,
+            params={
+                "username": settings.AFRICASTALKING_USERNAME,
+                "transactionId": transaction_ref,
+            },
+        )
+        if data.get("status") != "Success":
+            raise PaymentProviderError(
+                f"Transaction lookup failed: {data.get('errorMessage') or data.get('status')}"
+            )
+
+        transaction = data.get("data") or {}
+        return PaymentResult(
+            transaction_ref=transaction_ref,
+            status=provider_status(transaction.get("status")),
+            detail=transaction.get("description"),
+        )
+
+    async def find(
+        self, payment_id: UUID, phone_number: str, since: datetime
+    ) -> Optional[PaymentResult]:
+        # Checkouts from the customer's number, matched on the metadata sent with charge()
+        data = await self._request(
+            "GET",
+            settings.PAYMENT_FETCH_URL,
+            params={
+                "username": settings.AFRICASTALKING_USERNAME,
+                "productName": settings.PAYMENT_PRODUCT_NAME,
+                "pageNumber": 1,
+                "count": 1000,
+                "category": "MobileCheckout",
+                "source": phone_number,
+                "startDate": since.date().isoformat(),
+                "endDate": utcnow().date().isoformat(),
+            },
+        )
+        if data.get("status") != "Success":
+            raise PaymentProviderError(
+                f"Transaction lookup failed: {data.get('errorMessage') or data.get('status')}"
+            )
+
+        for transaction in data.get("responses") or []:
+            metadata = transaction.get("requestMetadata") or {}
+            if metadata.get("payment_id") == str(payment_id):
+                return PaymentResult(
+                    transaction_ref=transaction.get("transactionId"),
+                    status=provider_status(transaction.get("status")),
+                    detail=transaction.get("description"),
+                )
+        return None
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class FakePaymentProvider(PaymentProvider):
+    """
+    In-memory provider for tests and local development.
+
+    Charges settle after checks_to_settle status checks, as paid unless the
+    number is in fail_numbers.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        checks_to_settle: int = 1,
+        fail_numbers: Optional[Set[str]] = None,
+    ):
+        self.latency = latency
+        self.checks_to_settle = checks_to_settle
+        self.fail_numbers = fail_numbers or set()
+        self.charges: Dict[str, Dict[str, Any]] = {}
+
+    async def charge(self, payment_id: UUID, phone_number: str, amount: float) -> PaymentResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        transaction_ref = f"fake-{uuid4().hex}"
+        self.charges[transaction_ref] = {
+            "payment_id": str(payment_id),
+            "phone_number": phone_number,
+            "amount": amount,
+            "checks": 0,
+            "outcome": "Failed" if phone_number in self.fail_numbers else "Success",
+        }
+        return PaymentResult(transaction_ref, PaymentStatus.PENDING, "Waiting for customer")
+
+    async def check(self, transaction_ref: str) -> PaymentResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        charge = self.charges.get(transaction_ref)
+        if charge is None:
+            return PaymentResult(transaction_ref, PaymentStatus.FAILED, "Unknown transaction")
+
+        charge["checks"] += 1
+        if charge["checks"] < self.checks_to_settle:
+            return PaymentResult(transaction_ref, PaymentStatus.PENDING, "Waiting for customer")
+        return PaymentResult(transaction_ref, provider_status(charge["outcome"]), charge["outcome"])
+
+    async def find(
+        self, payment_id: UUID, phone_number: str, since: datetime
+    ) -> Optional[PaymentResult]:
+        for transaction_ref, charge in self.charges.items():
+            if charge["payment_id"] == str(payment_id):
+                return PaymentResult(transaction_ref, PaymentStatus.PENDING, "Waiting for customer")
+        return None
+
+
+# Payments the worker picks up when next_check_at has passed: pending ones,
+# and failed ones made due again by a late success callback
+CHECKED_STATUSES = (PaymentStatus.PENDING, PaymentStatus.FAILED)
+
+
+def build_provider(name: Optional[str] = None) -> PaymentProvider:
+    """Build the payment provider configured in settings"""
+    name = name or settings.PAYMENT_PROVIDER
+    if name == "fake":
+        return FakePaymentProvider()
+    if name == "africastalking":
+        return AfricasTalkingPayments()
+    raise ValueError(f"Unknown payment provider: {name}")
+
+
+class PaymentWorker(PollingWorker):
+    """
+    Submits mobile money charges and polls them until they settle.
+
+    A pending payment is due when next_check_at has passed. Without a
+    transaction_ref the charge is submitted, otherwise its status is
+    checked, backing off between checks. Rows are leased like the SMS
+    outbox, so several workers can share the table.
+
+    submitted_at is committed before a charge is sent. A payment that has
+    it but no transaction_ref may have been charged already (the request
+    timed out, or the worker died before recording the response), so it
+    is looked up with the provider and only charged again if the provider
+    has no charge for it.
+
+    Callbacks do not settle payments themselves, they make the payment due
+    with recheck() so that the worker checks it with the provider right
+    away. Only the worker holding the lease records a status, and only
+    the first final status is applied, except that a payment given up on
+    as FAILED still turns PAID if a late success callback is confirmed.
+
+    While the provider is not configured, or once it refuses our
+    credentials, the worker pauses: payments stay pending, neither
+    charged nor failed, until the settings are fixed and it restarts.
+    """
+
+    def __init__(self, provider: Optional[PaymentProvider] = None):
+        super().__init__(
+            batch_size=settings.PAYMENT_BATCH_SIZE,
+            poll_interval=settings.PAYMENT_POLL_SECONDS,
+        )
+        self._provider = provider
+        self.max_attempts = settings.PAYMENT_MAX_ATTEMPTS
+        self.lease_seconds = settings.PAYMENT_LEASE_SECONDS
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.paused: Optional[str] = None
+
+    @property
+    def provider(self) -> PaymentProvider:
+        if self._provider is None:
+            self._provider = build_provider()
+        return self._provider
+
+    def set_provider(self, provider: PaymentProvider) -> None:
+        """Swap the provider, e.g. for a FakePaymentProvider in tests"""
+        self._provider = provider
+        self.paused = None
+
+    def pause(self, reason: str) -> None:
+        """Stop charging and checking payments until the worker is restarted"""
+        if self.paused is None:
+            self.logger.error("Payment worker paused, payments stay pending: %s", reason)
+        self.paused = reason
+
+    def backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter between status checks"""
+        delay = settings.PAYMENT_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+        delay = min(delay, settings.PAYMENT_BACKOFF_MAX_SECONDS)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _transition(
+        self,
+        session: AsyncSession,
+        conditions: tuple,
+        status: PaymentStatus,
+        reason: Optional[str] = None,
+        from_status: PaymentStatus = PaymentStatus.PENDING,
+        **values,
+    ) -> bool:
+        """
+        Move a payment in from_status to PAID or FAILED and its order to
+        CONFIRMED or CANCELLED. A FAILED payment only moves to PAID, which
+        confirms its cancelled order again. Returns False if no payment in
+        from_status matched. The caller commits.
+        """
+        conditions = (*conditions, Payment.status == from_status)
+        order_id = (await session.exec(select(Payment.order_id).where(*conditions))).first()
+        if order_id is None:
+            return False
+
+        now = utcnow()
+        paid = status == PaymentStatus.PAID
+        result = await session.execute(
+            update(Payment)
+            .where(*conditions)
+            .values(
+                status=status,
+                payment_date=now if paid else None,
+                failure_reason=None if paid else reason,
+                next_check_at=None,
+                claim_token=None,
+                updated_at=now,
+                **values,
+            )
+        )
+        if result.rowcount == 0:
+            return False
+
+        order_status = (
+            OrderStatus.PENDING if from_status == PaymentStatus.PENDING else OrderStatus.CANCELLED
+        )
+        await session.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == order_status)
+            .values(
+                status=OrderStatus.CONFIRMED if paid else OrderStatus.CANCELLED,
+                updated_at=now,
+            )
+        )
+        if from_status != PaymentStatus.PENDING:
+            self.logger.warning("Late payment for order %s applied after it failed", order_id)
+        self.logger.info("Payment for order %s %s", order_id, status.value)
+        return True
+
+    async def recheck(
+        self, session: AsyncSession, transaction_ref: str, status: PaymentStatus
+    ) -> bool:
+        """
+        Check a submitted payment now, when the provider reports a status
+        for it. A pending payment is always checked, a failed one only when
+        reported paid, with a fresh budget of attempts.
+        """
+        statuses = [PaymentStatus.PENDING]
+        if status == PaymentStatus.PAID:
+            statuses.append(PaymentStatus.FAILED)
+        result = await session.execute(
+            update(Payment)
+            .where(
+                Payment.transaction_ref == transaction_ref,
+                Payment.status.in_(statuses),
+            )
+            .values(
+                next_check_at=utcnow(),
+                attempts=case(
+                    (Payment.status == PaymentStatus.FAILED, 0), else_=Payment.attempts
+                ),
+            )
+        )
+        await session.commit()
+        if result.rowcount == 0:
+            return False
+        self.notify()
+        return True
+
+    async def schedule(self, session: AsyncSession, payment_id: UUID) -> bool:
+        """Queue the charge for a pending payment that has not been submitted"""
+        result = await session.execute(
+            update(Payment)
+            .where(
+                Payment.id == payment_id,
+                Payment.status == PaymentStatus.PENDING,
+                Payment.transaction_ref.is_(None),
+            )
+            .values(next_check_at=utcnow(), attempts=0)
+        )
+        await session.commit()
+        if result.rowcount == 0:
+            return False
+        self.notify()
+        return True
+
+    async def _claim_batch(self) -> List[Tuple[Payment, str]]:
+        """Lease a batch of due payments, with the customer's phone number"""
+        now = utcnow()
+        token = uuid4().hex
+
+        async with async_session() as session:
+            due_ids = (
+                await session.exec(
+                    select(Payment.id)
+                    .where(
+                        Payment.status.in_(CHECKED_STATUSES),
+                        Payment.next_check_at <= now,
+                    )
+                    .order_by(Payment.next_check_at)
+                    .limit(self.batch_size)
+                )
+            ).all()
+            if not due_ids:
+                return []
+
+            await session.execute(
+                update(Payment)
+                .where(
+                    Payment.id.in_(due_ids),
+                    Payment.status.in_(CHECKED_STATUSES),
+                    Payment.next_check_at <= now,
+                )
+                .values(
+                    claim_token=token,
+                    next_check_at=now + timedelta(seconds=self.lease_seconds),
+                )
+            )
+
+            rows = (
+                await session.exec(
+                    select(Payment, User.phone_number)
+                    .join(Order, Order.id == Payment.order_id)
+                    .join(User, User.id == Order.user_id)
+                    .where(Payment.claim_token == token)
+                )
+            ).all()
+            # Detached first, so the rows keep the submitted_at of earlier attempts
+            session.expunge_all()
+
+            await session.execute(
+                update(Payment)
+                .where(
+                    Payment.claim_token == token,
+                    Payment.transaction_ref.is_(None),
+                    Payment.submitted_at.is_(None),
+                )
+                .values(submitted_at=now)
+            )
+            await session.commit()
+            return list(rows)
+
+    async def _process(
+        self, payment: Payment, phone_number: str
+    ) -> Tuple[Payment, Optional[PaymentResult], Optional[PaymentProviderError]]:
+        """Submit or check one payment with the provider"""
+        async with self._semaphore:
+            try:
+                if payment.transaction_ref is not None:
+                    result = await self.provider.check(payment.transaction_ref)
+                else:
+                    result = None
+                    if payment.submitted_at is not None:
+                        result = await self.provider.find(
+                            payment.id, phone_number, payment.submitted_at
+                        )
+                    if result is None:
+                        result = await self.provider.charge(
+                            payment.id, phone_number, payment.amount
+                        )
+                return payment, result, None
+            except PaymentConfigError as e:
+                self.pause(str(e))
+                return payment, None, e
+            except PaymentProviderError as e:
+                return payment, None, e
+
+    async def _record_result(
+        self,
+        session: AsyncSession,
+        payment: Payment,
+        result: Optional[PaymentResult],
+        error: Optional[PaymentProviderError],
+    ) -> None:
+        # Only the worker holding the lease may record the result
+        lease = (Payment.id == payment.id, Payment.claim_token == payment.claim_token)
+
+        if isinstance(error, PaymentConfigError):
+            # Not the payment's fault, hand it back as it was before the claim
+            await session.execute(
+                update(Payment)
+                .where(*lease)
+                .values(
+                    claim_token=None,
+                    next_check_at=utcnow(),
+                    submitted_at=payment.submitted_at,
+                )
+            )
+            return
+
+        attempts = payment.attempts + 1
+        values: Dict[str, Any] = {"attempts": attempts}
+        if result is not None and result.transaction_ref and payment.transaction_ref is None:
+            values["transaction_ref"] = result.transaction_ref
+
+        pending = payment.status == PaymentStatus.PENDING
+        final = result is not None and result.status != PaymentStatus.PENDING
+        reason = str(error) if error else (result.detail if result else None)
+
+        if final and (pending or result.status == PaymentStatus.PAID):
+            await self._transition(
+                session, lease, result.status, reason, from_status=payment.status, **values
+            )
+        elif pending and attempts >= self.max_attempts:
+            await self._transition(
+                session,
+                lease,
+                PaymentStatus.FAILED,
+                reason or "Payment was not confirmed in time",
+                **values,
+            )
+        else:
+            # A failed payment rechecked after a late callback stays failed
+            # once the provider reports it failed or the attempts run out
+            done = not pending and (final or attempts >= self.max_attempts)
+            if pending:
+                values["failure_reason"] = str(error) if error else None
+            now = utcnow()
+            await session.execute(
+                update(Payment)
+                .where(*lease, Payment.status == payment.status)
+                .values(
+                    claim_token=None,
+                    next_check_at=None if done else now + timedelta(seconds=self.backoff(attempts)),
+                    updated_at=now,
+                    **values,
+                )
+            )
+
+    async def drain_once(self) -> int:
+        """Submit or check one batch of due payments, returns the number processed"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.PAYMENT_MAX_CONCURRENCY)
+        if self.paused is None and not self.provider.configured:
+            self.pause(f"{settings.PAYMENT_PROVIDER} payment provider is not configured")
+        if self.paused is not None:
+            return 0
+
+        claimed = await self._claim_batch()
+        if not claimed:
+            return 0
+
+        results = await asyncio.gather(
+            *(self._process(payment, phone_number) for payment, phone_number in claimed)
+        )
+        async with async_session() as session:
+            for payment, result, error in results:
+                await self._record_result(session, payment, result, error)
+            await session.commit()
+
+        self.logger.info("Payment batch processed: %d payments", len(claimed))
+        return len(claimed)
+
+    async def aclose(self) -> None:
+        if self._provider is not None:
+            await self._provider.aclose()
+            self._provider = None
+        self._semaphore = None
+        self.paused = None
+
+
+payment_worker = PaymentWorker()
+
+
+async def run_payment_worker() -> None:
+    """Entry point for a standalone payment worker process"""
+    try:
+        await payment_worker.run()
+    finally:
+        await payment_worker.aclose()
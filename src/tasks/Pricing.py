@@ -0,0 +1,117 @@
+import bisect
+import logging
+import time
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.schemas.types import as_utc, utcnow
+from src.schemas.users import FuelPrice
+
+
+class PriceQuote(NamedTuple):
+    price_id: Optional[int]  # None when falling back to settings.PRICE_PER_LITER
+    price_per_liter: float
+
+
+class PriceResolver:
+    """
+    Resolves the fuel price in force at a given time.
+
+    All price versions are held in memory sorted by effective_from, so a
+    lookup is a bisect with no I/O and prices scheduled ahead take effect
+    on time without a reload. After the TTL the table's version, its
+    highest id and row count, is read with one aggregate query on the
+    primary key and the rows are only re-read if it changed. Every worker
+    therefore sees a new price within one TTL whatever the cache backend,
+    and the writing worker immediately.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.PRICE_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._effective_from: List[datetime] = []
+        self._quotes: List[PriceQuote] = []
+        self._version: Optional[Tuple[Optional[int], int]] = None
+        self._expires_at = 0.0
+        self.reloads = 0
+        self.logger = logging.getLogger(__name__)
+
+    def invalidate(self) -> None:
+        """Drop the local snapshot, the next lookup re-reads the table"""
+        self._version = None
+        self._expires_at = 0.0
+
+    async def _refresh(self, session: AsyncSession) -> None:
+        version = tuple(
+            (
+                await session.exec(select(func.max(FuelPrice.id), func.count(FuelPrice.id)))
+            ).one()
+        )
+        if version != self._version:
+            rows = (
+                await session.exec(
+                    select(FuelPrice).order_by(FuelPrice.effective_from, FuelPrice.id)
+                )
+            ).all()
+            self._effective_from = [row.effective_from for row in rows]
+            self._quotes = [PriceQuote(row.id, row.price_per_liter) for row in rows]
+            self._version = version
+            self.reloads += 1
+        self._expires_at = time.monotonic() + self.ttl
+
+    def _quote_at(self, when: datetime) -> PriceQuote:
+        index = bisect.bisect_right(self._effective_from, when)
+        if index == 0:
+            return PriceQuote(None, settings.PRICE_PER_LITER)
+        return self._quotes[index - 1]
+
+    async def current(
+        self, session: AsyncSession, when: Optional[datetime] = None
+    ) -> PriceQuote:
+        """The price in force at `when` (naive is UTC), now by default"""
+        if time.monotonic() >= self._expires_at:
+            await self._refresh(session)
+        return self._quote_at(as_utc(when) if when else utcnow())
+
+    async def set_price(
+        self,
+        session: AsyncSession,
+        price_per_liter: float,
+        effective_from: Optional[datetime] = None,
+    ) -> FuelPrice:
+        """Add a price version, other workers pick it up within one TTL"""
+        if isinstance(price_per_liter, bool) or not price_per_liter or price_per_liter <= 0:
+            raise ValueError("Price per liter must be a positive number")
+
+        price = FuelPrice(
+            price_per_liter=price_per_liter,
+            effective_from=as_utc(effective_from) if effective_from else utcnow(),
+        )
+        session.add(price)
+        await session.commit()
+        await session.refresh(price)
+
+        self.invalidate()
+        self.logger.info(
+            "Fuel price %s set to %s from %s",
+            price.id,
+            price.price_per_liter,
+            price.effective_from,
+        )
+        return price
+
+    async def history(self, session: AsyncSession, limit: int = 50) -> List[FuelPrice]:
+        """Most recent price versions first"""
+        rows = await session.exec(
+            select(FuelPrice)
+            .order_by(FuelPrice.effective_from.desc(), FuelPrice.id.desc())
+            .limit(limit)
+        )
+        return list(rows.all())
+
+
+price_resolver = PriceResolver()
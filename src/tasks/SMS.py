@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from src.config.settings import settings
+from src.schemas.sms import RecipientResponseData, SMSMessageResponseData
+from src.utils.metrics import sms_gateway_duration, sms_gateway_errors
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class SMSGatewayError(Exception):
+    """Raised by gateways when a request to the provider fails"""
+
+
+class SMSGateway:
+    """Base class for SMS gateways used by the dispatcher"""
+
+    async def send(self, phone_numbers: List[str], message: str) -> SMSMessageResponseData:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class AfricasTalkingGateway(SMSGateway):
+    """Africa's Talking bulk messaging gateway over a pooled keep-alive client"""
+
+    def __init__(self, client: Optional["httpx.AsyncClient"] = None):
+        # httpx is only needed once the first SMS goes out, keep it off the import path
+        import httpx
+
+        self.url = settings.SMS_API_URL
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.SMS_TIMEOUT_SECONDS,
+                connect=settings.SMS_CONNECT_TIMEOUT_SECONDS,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.SMS_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SMS_MAX_CONNECTIONS,
+            ),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "apiKey": settings.AFRICASTALKING_API_KEY,
+            },
+        )
+
+    async def send(self, phone_numbers: List[str], message: str) -> SMSMessageResponseData:
+        message_body = {
+            "username": settings.AFRICASTALKING_USERNAME,
+            "message": message,
+            "senderId": settings.SENDER_ID,
+            "phoneNumbers": [number.replace("+", "") for number in phone_numbers],
+        }
+
+        import httpx
+
+        try:
+            response = await self.client.post(self.url, json=message_body)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise SMSGatewayError(str(e)) from e
+
+        response_data = response.json().get("SMSMessageData", {})
+        return SMSMessageResponseData.model_validate(response_data)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class FakeSMSGateway(SMSGateway):
+    """In-memory gateway for tests and local development"""
+
+    def __init__(self, latency: float = 0.0, fail_numbers: Optional[Set[str]] = None):
+        self.latency = latency
+        self.fail_numbers = fail_numbers or set()
+        self.sent: List[dict] = []
+
+    async def send(self, phone_numbers: List[str], message: str) -> SMSMessageResponseData:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        recipients = []
+        failures = 0
+        for number in phone_numbers:
+            failed = number in self.fail_numbers
+            failures += failed
+            recipients.append(
+                RecipientResponseData(
+                    statusCode=403 if failed else 101,
+                    number=number,
+                    status="InvalidPhoneNumber" if failed else "Success",
+                    cost="0" if failed else "TZS 0.0000",
+                    messageId="None" if failed else f"fake-{len(self.sent)}",
+                )
+            )
+            self.sent.append({"phone_number": number, "message": message})
+
+        return SMSMessageResponseData(
+            Message=f"Sent to {len(phone_numbers) - failures}/{len(phone_numbers)}",
+            Recipients=recipients,
+        )
+
+
+def build_gateway(name: Optional[str] = None) -> SMSGateway:
+    """Build the gateway configured in settings"""
+    name = name or settings.SMS_GATEWAY
+    if name == "fake":
+        return FakeSMSGateway()
+    if name == "africastalking":
+        return AfricasTalkingGateway()
+    raise ValueError(f"Unknown SMS gateway: {name}")
+
+
+# Processed, Sent and Queued all mean the gateway accepted the message
+ACCEPTED_STATUS_CODES = {100, 101, 102}
+
+
+def is_delivered(recipient: RecipientResponseData) -> bool:
+    """Check whether Africa's Talking accepted the message for a recipient"""
+    return recipient.statusCode in ACCEPTED_STATUS_CODES
+
+
+class SMSDispatcher:
+    """
+    Sends SMS through the gateway with bounded concurrency.
+
+    Request handlers never call it directly: they write to the outbox and
+    the outbox worker delivers through the dispatcher.
+    """
+
+    def __init__(self, gateway: Optional[SMSGateway] = None, max_concurrency: Optional[int] = None):
+        self._gateway = gateway
+        self.max_concurrency = max_concurrency or settings.SMS_MAX_CONCURRENCY
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def gateway(self) -> SMSGateway:
+        if self._gateway is None:
+            self._gateway = build_gateway()
+        return self._gateway
+
+    def set_gateway(self, gateway: SMSGateway) -> None:
+        """Swap the gateway, e.g. for a FakeSMSGateway in tests"""
+        self._gateway = gateway
+
+    async def start(self) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def send_many(self, phone_numbers: List[str], message: str) -> Optional[SMSMessageResponseData]:
+        """Send one message to many numbers, returning the gateway response"""
+        if self._semaphore is None:
+            await self.start()
+
+        gateway_name = type(self.gateway).__name__
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                return await self.gateway.send(phone_numbers, message)
+            except (SMSGatewayError, ValueError) as e:
+                sms_gateway_errors.inc(gateway_name)
+                self.logger.error("SMS gateway request failed: %s", e)
+                return None
+            finally:
+                sms_gateway_duration.observe(time.perf_counter() - started, gateway_name)
+
+    async def send(self, phone_number: str, message: str) -> bool:
+        """Send a single SMS and wait for the gateway result"""
+        response = await self.send_many([phone_number], message)
+        if not response or not response.Recipients:
+            return False
+
+        recipient = response.Recipients[0]
+        if is_delivered(recipient):
+            self.logger.info("Successfully sent SMS to %s", phone_number)
+            return True
+
+        self.logger.error("SMS sending failed with status: %s", recipient.status)
+        return False
+
+    async def aclose(self) -> None:
+        """Release the HTTP client"""
+        if self._gateway is not None:
+            await self._gateway.aclose()
+            self._gateway = None
+
+
+def _recipient_key(phone_number: str) -> str:
+    """Key used to match gateway recipients back to queued numbers"""
+    return phone_number.strip().lstrip("+")
+
+
+class SMSBatcher:
+    """
+    Coalesces individual sends into bulk gateway requests.
+
+    Messages with identical text are grouped and sent as one request to the
+    bulk endpoint once the group reaches max_size or has waited linger
+    seconds. Each caller gets back the Recipients entry for its own number.
+    """
+
+    def __init__(
+        self,
+        sms_dispatcher: Optional[SMSDispatcher] = None,
+        max_size: Optional[int] = None,
+        linger: Optional[float] = None,
+    ):
+        self.dispatcher = sms_dispatcher or dispatcher
+        self.max_size = max_size or settings.SMS_BATCH_MAX_SIZE
+        self.linger = settings.SMS_BATCH_LINGER_SECONDS if linger is None else linger
+        # message -> recipient key -> (phone number, waiting futures)
+        self._groups: Dict[str, Dict[str, Tuple[str, List[asyncio.Future]]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self.logger = logging.getLogger(__name__)
+
+    async def send(self, phone_number: str, message: str) -> Optional[RecipientResponseData]:
+        """Queue a message and wait for the gateway result for this number"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        group = self._groups.setdefault(message, {})
+        key = _recipient_key(phone_number)
+        if key in group:
+            group[key][1].append(future)
+        else:
+            group[key] = (phone_number, [future])
+
+        if len(group) >= self.max_size:
+            self._flush(message)
+        elif message not in self._timers:
+            self._timers[message] = loop.call_later(self.linger, self._flush, message)
+
+        return await future
+
+    def _flush(self, message: str) -> None:
+        timer = self._timers.pop(message, None)
+        if timer is not None:
+            timer.cancel()
+
+        group = self._groups.pop(message, None)
+        if not group:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._send_group(message, group))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send_group(
+        self, message: str, group: Dict[str, Tuple[str, List[asyncio.Future]]]
+    ) -> None:
+        phone_numbers = [phone_number for phone_number, _ in group.values()]
+        response = await self.dispatcher.send_many(phone_numbers, message)
+
+        recipients = {}
+        if response is not None:
+            recipients = {
+                _recipient_key(recipient.number): recipient
+                for recipient in response.Recipients
+            }
+        self.logger.info(
+            "Bulk SMS request sent to %d recipients, %d reported back",
+            len(phone_numbers),
+            len(recipients),
+        )
+
+        for key, (_, futures) in group.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(recipients.get(key))
+
+    async def flush_all(self) -> None:
+        """Send every waiting group now and wait for the results"""
+        for message in list(self._groups):
+            self._flush(message)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+
+dispatcher = SMSDispatcher()
+batcher = SMSBatcher(dispatcher)
@@ -0,0 +1,209 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.schemas.orders import OrderStatus
+from src.schemas.sales import SalesDaily, SalesHourly
+from src.schemas.types import utcnow
+from src.schemas.users import Order
+from src.tasks.Export import parse_date
+
+# Bucket keys are UTC "YYYY-MM-DD" and "YYYY-MM-DDTHH" strings
+DAY_KEY_FORMAT = "%Y-%m-%d"
+HOUR_KEY_FORMAT = "%Y-%m-%dT%H"
+
+GRANULARITIES = {
+    "day": (SalesDaily, "day", DAY_KEY_FORMAT),
+    "hour": (SalesHourly, "hour", HOUR_KEY_FORMAT),
+}
+
+# The same formats for PostgreSQL to_char
+_PG_KEY_FORMATS = {
+    DAY_KEY_FORMAT: "YYYY-MM-DD",
+    HOUR_KEY_FORMAT: 'YYYY-MM-DD"T"HH24',
+}
+
+
+def bucket_key(value: datetime, key_format: str) -> str:
+    """The rollup key a timestamp falls in"""
+    return value.astimezone(timezone.utc).strftime(key_format)
+
+
+def bucket_start(value: datetime, key_format: str) -> datetime:
+    """The UTC start of the rollup bucket a timestamp falls in"""
+    return datetime.strptime(bucket_key(value, key_format), key_format).replace(
+        tzinfo=timezone.utc
+    )
+
+
+def _bucket_expression(dialect_name: str, key_format: str):
+    """SQL computing bucket_key() of Order.created_at"""
+    if dialect_name == "postgresql":
+        return func.to_char(
+            func.timezone("UTC", Order.created_at), _PG_KEY_FORMATS[key_format]
+        )
+    # SQLite stores naive UTC, see UTCDateTime
+    return func.strftime(key_format, Order.created_at)
+
+
+def _upsert_insert(dialect_name: str):
+    """Dialect specific INSERT supporting ON CONFLICT DO UPDATE, if any"""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+class SalesAggregator:
+    """
+    Maintains per-day and per-hour rollups of completed orders.
+
+    Rollups are incremented in the same transaction that completes the
+    orders, so dashboards read O(days) rows instead of scanning orders.
+    rebuild() recomputes them from scratch.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    async def _increment(
+        self, session: AsyncSession, granularity: str, totals: Dict[str, List[float]]
+    ) -> None:
+        model, key_name, _ = GRANULARITIES[granularity]
+        key_column = getattr(model, key_name)
+        now = utcnow()
+        dialect_insert = _upsert_insert(session.bind.dialect.name)
+
+        for key, (liters, revenue, orders) in totals.items():
+            values = {
+                key_name: key,
+                "liters": liters,
+                "revenue": revenue,
+                "orders": orders,
+                "updated_at": now,
+            }
+            if dialect_insert is not None:
+                statement = dialect_insert(model).values(values)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[key_name],
+                    set_={
+                        "liters": model.liters + statement.excluded.liters,
+                        "revenue": model.revenue + statement.excluded.revenue,
+                        "orders": model.orders + statement.excluded.orders,
+                        "updated_at": now,
+                    },
+                )
+                await session.execute(statement)
+                continue
+
+            result = await session.execute(
+                update(model)
+                .where(key_column == key)
+                .values(
+                    liters=model.liters + liters,
+                    revenue=model.revenue + revenue,
+                    orders=model.orders + orders,
+                    updated_at=now,
+                )
+            )
+            if result.rowcount == 0:
+                await session.execute(insert(model).values(values))
+
+    async def record_completed(self, session: AsyncSession, orders: Iterable[Order]) -> None:
+        """Add completed orders to the rollups, the caller commits"""
+        for granularity, (_, _, key_format) in GRANULARITIES.items():
+            totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0])
+            for order in orders:
+                bucket = totals[bucket_key(order.created_at, key_format)]
+                bucket[0] += order.volume
+                bucket[1] += order.total_amount
+                bucket[2] += 1
+            await self._increment(session, granularity, totals)
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        """Recompute every rollup from the completed orders"""
+        now = utcnow()
+        dialect_name = session.bind.dialect.name
+        for granularity, (model, key_name, key_format) in GRANULARITIES.items():
+            bucket = _bucket_expression(dialect_name, key_format)
+            await session.execute(delete(model))
+            await session.execute(
+                insert(model).from_select(
+                    [key_name, "liters", "revenue", "orders", "updated_at"],
+                    select(
+                        bucket,
+                        func.sum(Order.volume),
+                        func.sum(Order.total_amount),
+                        func.count(Order.id),
+                        literal(now, type_=model.__table__.c.updated_at.type),
+                    )
+                    .where(Order.status == OrderStatus.COMPLETED)
+                    .group_by(bucket),
+                )
+            )
+        await session.commit()
+        self.logger.info("Sales rollups rebuilt")
+
+    async def query(
+        self,
+        session: AsyncSession,
+        granularity: str = "day",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Read rollups for buckets in [start, end), plus the totals over the range.
+
+        Rollups cannot be split, so start and end must fall on a bucket
+        boundary in UTC (midnight for days, the hour for hours); anything
+        else raises ValueError rather than silently widening or narrowing
+        the range.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+
+        model, key_name, key_format = GRANULARITIES[granularity]
+        key_column = getattr(model, key_name)
+        start, end = parse_date(start), parse_date(end)
+        for name, value in (("start", start), ("end", end)):
+            if value and bucket_start(value, key_format) != value:
+                raise ValueError(
+                    f"{name} must be at the start of a UTC {granularity}, "
+                    f"e.g. {bucket_start(value, key_format).isoformat()}"
+                )
+
+        query = select(model).order_by(key_column)
+        if start:
+            query = query.where(key_column >= bucket_key(start, key_format))
+        if end:
+            query = query.where(key_column < bucket_key(end, key_format))
+
+        rows = (await session.exec(query)).all()
+        return {
+            "granularity": granularity,
+            "buckets": [
+                {
+                    granularity: getattr(row, key_name),
+                    "liters": row.liters,
+                    "revenue": row.revenue,
+                    "orders": row.orders,
+                }
+                for row in rows
+            ],
+            "totals": {
+                "liters": sum(row.liters for row in rows),
+                "revenue": sum(row.revenue for row in rows),
+                "orders": sum(row.orders for row in rows),
+            },
+        }
+
+
+sales_aggregator = SalesAggregator()
@@ -1,24 +1,19 @@
 import logging
-import json
-import requests
-from typing import Optional, Dict, Any
-from sqlmodel import Session, select
+from uuid import UUID
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.config.settings import settings
-from src.schemas.sms import SMSMessageResponseData
+from src.schemas.sms import OutboundSMS
 from src.schemas.users import User
+from src.tasks.Outbox import outbox_worker
+from src.tasks.Payments import payment_worker
+from src.utils.cache import user_status_cache
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
-sms_url = "https://api.africastalking.com/version1/messaging/bulk"
-
 
 class Tasks:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         self.logger = logging.getLogger(__name__)
 
@@ -28,59 +23,42 @@ class Tasks:
         """
         cleaned_number = phone_number.strip().replace(" ", "")
         if not cleaned_number:
-            self.logger.error(f"Invalid phone number: {phone_number}")
+            self.logger.error("Invalid phone number: %s", phone_number)
             return False
         return True
 
-    def _make_api_request(
-        self, url: str, headers: Dict[str, str], data: Dict[str, Any]
-    ) -> Optional[requests.Response]:
-        """
-        Make API request with error handling and logging
-        """
-        try:
-            self.logger.debug(f"Making API request to {url}")
-            self.logger.debug(f"Request data: {json.dumps(data, indent=2)}")
-
-            response = requests.post(url=url, headers=headers, json=data)
-
-            self.logger.debug(f"Response status code: {response.status_code}")
-            self.logger.debug(f"Response content: {response.text}")
-
-            response.raise_for_status()
-            return response
-
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"API request failed: {str(e)}")
-            return None
-
-    def _update_user_verification(self, user_id: str) -> bool:
+    async def _update_user_verification(self, user_id: str) -> bool:
         """
         Update user verification status
         """
         try:
-            user = self.session.exec(select(User).where(User.id == user_id)).first()
+            user = (
+                await self.session.exec(select(User).where(User.id == user_id))
+            ).first()
             if not user:
-                self.logger.error(f"User not found with ID: {user_id}")
+                self.logger.error("User not found with ID: %s", user_id)
                 return False
 
             user.is_verified = True
-            self.session.commit()
-            self.session.refresh(user)
-            self.logger.info(
-                f"Successfully updated verification status for user: {user_id}"
-            )
+            await self.session.commit()
+            await self.session.refresh(user)
+            await user_status_cache.invalidate(user.phone_number)
+            self.logger.info("Successfully updated verification status for user: %s", user_id)
             return True
 
         except Exception as e:
-            self.logger.error(f"Failed to update user verification: {str(e)}")
+            self.logger.error("Failed to update user verification: %s", e)
             return False
 
-    def send_sms(self, phone_number: str, message: str, user_id: str) -> bool:
+    def queue_sms(self, phone_number: str, message: str) -> bool:
         """
-        Send an SMS to a phone number with enhanced error handling and logging
+        Add an SMS to the outbox in the current transaction, without committing.
+
+        Lets a caller write the SMS together with the rows it belongs to; the
+        caller commits and then wakes the outbox worker.
         """
-        self.logger.info(f"Attempting to send SMS to {phone_number}")
+        # Lazy %-style args, formatted on the log listener thread if at all
+        self.logger.info("Queueing SMS to %s", phone_number)
 
         # Validate inputs
         if not self._validate_phone_number(phone_number):
@@ -90,80 +68,69 @@ class Tasks:
             self.logger.error("Empty message provided")
             return False
 
-        # Prepare message body
-        message_body = {
-            "username": settings.AFRICASTALKING_USERNAME,
-            "message": message,
-            "senderId": settings.SENDER_ID,
-            "phoneNumbers": [phone_number.replace("+", "")],
-        }
-
-        # Prepare headers
-        headers = {
-            "Content-Type": "application/json",
-            "apiKey": settings.AFRICASTALKING_API_KEY,
-            "Accept": "application/json",
-        }
+        self.session.add(OutboundSMS(phone_number=phone_number, message=message))
+        return True
 
-        try:
-            # Make API request
-            response = self._make_api_request(sms_url, headers, message_body)
-            if not response:
-                return False
+    async def send_sms(self, phone_number: str, message: str, user_id: str) -> bool:
+        """
+        Queue an SMS to a phone number.
 
-            # Parse response
-            response = response.json()
-            response_data = response.get("SMSMessageData", {})
+        Returns True once the message is stored in the outbox; the outbox
+        worker delivers it and retries with backoff if the gateway fails.
+        """
+        if not self.queue_sms(phone_number, message):
+            return False
 
-            self.logger.debug(
-                f"Parsed response data: {json.dumps(response_data, indent=2)}"
-            )
+        try:
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            self.logger.error("Failed to queue SMS: %s", e)
+            return False
 
-            # Check response structure
-            if "Recipients" not in response_data:
-                self.logger.error("Invalid response structure: 'Recipients' not found")
-                return False
+        outbox_worker.notify()
+        return True
 
-            recipient = response_data["Recipients"][0]
-            if (
-                recipient.get("statusCode") == 101
-                and recipient.get("status") == "Success"
-            ):
-                self.logger.info(f"Successfully sent SMS to {phone_number}")
-                return True
-            else:
-                self.logger.error(
-                    f"SMS sending failed with status: {recipient.get('status')}"
-                )
-                return False
+    async def make_payment(self, payment_id: str) -> bool:
+        """
+        Queue the mobile money charge for a pending payment.
 
+        Returns True once the charge is scheduled; the payment worker submits
+        it and polls the provider until the payment settles.
+        """
+        try:
+            queued = await payment_worker.schedule(self.session, UUID(str(payment_id)))
+        except ValueError:
+            self.logger.error("Invalid payment ID: %s", payment_id)
+            return False
         except Exception as e:
-            self.logger.error(f"Unexpected error in send_sms: {str(e)}", exc_info=True)
+            await self.session.rollback()
+            self.logger.error("Failed to queue payment: %s", e)
             return False
 
-    def make_payment(self, amount: float):
-        """
-        Make a payment
-        """
-        pass
+        if not queued:
+            self.logger.error("No unsubmitted pending payment with ID: %s", payment_id)
+        return queued
 
     async def verify_otp(self, user_id: str, otp: str) -> bool:
         """
         Verify OTP
         """
         try:
-            user = self.session.exec(select(User).where(User.id == user_id)).first()
+            user = (
+                await self.session.exec(select(User).where(User.id == user_id))
+            ).first()
             if not user:
-                self.logger.error(f"User not found with ID: {user_id}")
+                self.logger.error("User not found with ID: %s", user_id)
                 return False
             if not user.is_verified:
                 # Update user verification
-                if self._update_user_verification(user_id):
-                    self.logger.info(f"User verified successfully: {user_id}")
+                if await self._update_user_verification(user_id):
+                    self.logger.info("User verified successfully: %s", user_id)
                     return True
                 else:
                     self.logger.error("Failed to update user verification status")
                     return False
         except Exception as e:
-            self.logger.error(f"Failed to verify OTP: {str(e)}")
+            self.logger.error("Failed to verify OTP: %s", e)
             return False
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Optional
+
+
+class PollingWorker:
+    """
+    Background loop draining a table of due rows in batches.
+
+    Subclasses implement drain_once. The loop sleeps poll_interval between
+    partial batches and can be woken early with notify().
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+        self.logger = logging.getLogger(self.__class__.__module__)
+
+    async def drain_once(self) -> int:
+        """Process one batch of due rows, returns the number processed"""
+        raise NotImplementedError
+
+    def notify(self) -> None:
+        """Wake the worker early, safe to call from any thread"""
+        if self._loop is None or self._wake is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self) -> None:
+        """Drain until stop() is called"""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+        while not self._stopping:
+            try:
+                processed = await self.drain_once()
+            except Exception as e:
+                self.logger.error(
+                    "%s drain failed: %s", self.__class__.__name__, e, exc_info=True
+                )
+                processed = 0
+
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self.notify()
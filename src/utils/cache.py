@@ -0,0 +1,302 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config.settings import settings
+from src.schemas.users import User
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiry and LRU eviction.
+
+    Keeps hit/miss/eviction counters so the size and TTL can be tuned from
+    real traffic.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _live_entry(self, key: Hashable, now: float):
+        """Return the entry for key, dropping it if expired. Caller holds the lock"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _ = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def _store(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.ttl if ttl is None else ttl
+        return None if ttl is None else time.monotonic() + ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None, nx: bool = False
+    ) -> bool:
+        """Store a value, with nx=True only if the key is not already set"""
+        with self._lock:
+            if nx and self._live_entry(key, time.monotonic()) is not None:
+                return False
+            self._store(key, value, self._expires_at(ttl))
+            return True
+
+    def incr(self, key: Hashable, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Increment a counter, the ttl only applies when the counter is created"""
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                self._store(key, amount, self._expires_at(ttl))
+                return amount
+
+            expires_at, value = entry
+            value = int(value) + amount
+            self._store(key, value, expires_at)
+            return value
+
+    def remaining_ttl(self, key: Hashable) -> Optional[float]:
+        """Seconds until the key expires, None if missing or without expiry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is None or entry[0] is None:
+                return None
+            return entry[0] - now
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CacheBackend:
+    """Key/value cache shared by the services, values must be JSON serializable"""
+
+    async def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, nx: bool = False
+    ) -> bool:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+    async def ttl(self, key: str) -> Optional[float]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Per-process backend for tests and single-node deployments"""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.store = TTLCache(maxsize=maxsize or settings.CACHE_MAX_ENTRIES)
+
+    async def get(self, key: str) -> Any:
+        return self.store.get(key)
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, nx: bool = False
+    ) -> bool:
+        return self.store.set(key, value, ttl=ttl, nx=nx)
+
+    async def delete(self, key: str) -> None:
+        self.store.delete(key)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return self.store.incr(key, amount=amount, ttl=ttl)
+
+    async def ttl(self, key: str) -> Optional[float]:
+        return self.store.remaining_ttl(key)
+
+
+# INCRBY and the expiry in one step, so a dropped connection cannot leave a
+# counter that never expires. Also repairs a counter found without expiry
+INCR_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if ARGV[2] ~= '' and redis.call('PTTL', KEYS[1]) < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
+class RedisCache(CacheBackend):
+    """Backend for any server speaking the Redis protocol (Redis, Valkey, KeyDB)"""
+
+    def __init__(self, url: Optional[str] = None, prefix: Optional[str] = None):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the 'redis' package to be installed"
+            ) from e
+
+        self.client = redis.from_url(url or settings.CACHE_URL, decode_responses=True)
+        self.prefix = settings.CACHE_KEY_PREFIX if prefix is None else prefix
+        self._incr = self.client.register_script(INCR_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def get(self, key: str) -> Any:
+        value = await self.client.get(self._key(key))
+        return None if value is None else json.loads(value)
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, nx: bool = False
+    ) -> bool:
+        px = int(ttl * 1000) if ttl is not None else None
+        result = await self.client.set(self._key(key), json.dumps(value), px=px, nx=nx)
+        return bool(result)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        px = "" if ttl is None else int(ttl * 1000)
+        return int(await self._incr(keys=[self._key(key)], args=[amount, px]))
+
+    async def ttl(self, key: str) -> Optional[float]:
+        remaining = await self.client.pttl(self._key(key))
+        return None if remaining < 0 else remaining / 1000
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def build_cache(name: Optional[str] = None) -> CacheBackend:
+    """Build the cache backend configured in settings"""
+    name = name or settings.CACHE_BACKEND
+    if name == "memory":
+        return MemoryCache()
+    if name == "redis":
+        return RedisCache()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+
+cache = build_cache()
+
+
+class UserStatusCache:
+    """
+    User existence, verification status and id keyed by E.164 phone number.
+
+    Backed by the shared cache so every worker sees the same invalidations.
+    Each invalidation bumps a per-number generation; a load only stores
+    what it read if the generation did not move meanwhile, so a load that
+    raced a registration cannot cache a stale "not registered". Hit/miss
+    counters are per process.
+    """
+
+    prefix = "user_status:"
+    generation_prefix = "user_status_generation:"
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: Optional[float] = None):
+        self.backend = backend or cache
+        self.ttl = ttl or settings.USER_CACHE_TTL_SECONDS
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        user_status = await self.backend.get(f"{self.prefix}{phone_number}")
+        if user_status is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user_status
+
+    async def set(self, phone_number: str, user_status: Dict[str, Any]) -> None:
+        await self.backend.set(f"{self.prefix}{phone_number}", user_status, ttl=self.ttl)
+
+    async def invalidate(self, phone_number: Optional[str]) -> None:
+        if phone_number:
+            await self.backend.incr(f"{self.generation_prefix}{phone_number}", ttl=self.ttl)
+            await self.backend.delete(f"{self.prefix}{phone_number}")
+
+    async def load(self, phone_number: str, session: AsyncSession) -> Dict[str, Any]:
+        """Get the status for an E.164 number, querying the database on a miss"""
+        user_status = await self.get(phone_number)
+        if user_status is not None:
+            return user_status
+
+        generation_key = f"{self.generation_prefix}{phone_number}"
+        generation = await self.backend.get(generation_key)
+        user = (
+            await session.exec(select(User).where(User.phone_number == phone_number))
+        ).first()
+
+        user_status = {
+            "exists": user is not None,
+            "is_verified": user.is_verified if user else False,
+            "user_id": str(user.id) if user else None,
+        }
+        if await self.backend.get(generation_key) == generation:
+            await self.set(phone_number, user_status)
+        return user_status
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+user_status_cache = UserStatusCache()
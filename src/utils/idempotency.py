@@ -0,0 +1,325 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.utils.cache import CacheBackend, cache
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+
+# Response headers kept with a stored response and sent again on replay
+REPLAYED_HEADERS = (b"content-type", b"location")
+
+# Client errors that may go away on retry (timeout, conflict, too early, rate
+# limited), never stored so the retry runs again
+TRANSIENT_STATUSES = {408, 409, 425, 429}
+
+
+def is_replayable(status: int) -> bool:
+    """Whether a response is final, i.e. a retry should get the same one"""
+    if 200 <= status < 300:
+        return True
+    return 400 <= status < 500 and status not in TRANSIENT_STATUSES
+
+
+class IdempotencyConflict(Exception):
+    """The key was used for a different request body"""
+
+
+class IdempotencyTimeout(Exception):
+    """The request holding the key did not finish in time"""
+
+
+class IdempotencyStore:
+    """
+    Claims idempotency keys and keeps the responses of finished requests.
+
+    The first request with a key claims it with a set(nx=True) and runs,
+    then stores its response for IDEMPOTENCY_TTL_SECONDS. Duplicates that
+    arrive meanwhile wait for that response instead of running again;
+    duplicates in the same process are woken as soon as it is stored, the
+    others poll the shared cache. A claim expires after
+    IDEMPOTENCY_LOCK_SECONDS so a crashed request does not hold its key.
+    """
+
+    prefix = "idempotency:"
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or cache
+        self.ttl = settings.IDEMPOTENCY_TTL_SECONDS
+        self.lock_seconds = settings.IDEMPOTENCY_LOCK_SECONDS
+        self.wait_seconds = settings.IDEMPOTENCY_WAIT_SECONDS
+        self._inflight: Dict[str, asyncio.Event] = {}
+
+    def _key(self, scope: str, key: str) -> str:
+        return f"{self.prefix}{scope}:{key}"
+
+    async def claim(self, scope: str, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for a request, or return the stored response of an
+        earlier request with the same key, waiting for it if it is still
+        running. Returns None when the caller claimed the key and must run
+        the request, then call complete() or release().
+        """
+        cache_key = self._key(scope, key)
+        deadline = time.monotonic() + self.wait_seconds
+        delay = 0.02
+        while True:
+            claimed = await self.backend.set(
+                cache_key,
+                {"state": PENDING, "fingerprint": fingerprint},
+                ttl=self.lock_seconds,
+                nx=True,
+            )
+            if claimed:
+                self._inflight[cache_key] = asyncio.Event()
+                return None
+
+            entry = await self.backend.get(cache_key)
+            if entry is None:
+                # Released or expired between the two calls, try to claim it again
+                continue
+            if entry.get("fingerprint") != fingerprint:
+                raise IdempotencyConflict("Idempotency key reused with a different request")
+            if entry["state"] == DONE:
+                return entry["response"]
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyTimeout("A request with this idempotency key is in progress")
+
+            event = self._inflight.get(cache_key)
+            if event is not None:
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.5)
+
+    async def complete(
+        self, scope: str, key: str, fingerprint: str, response: Dict[str, Any]
+    ) -> None:
+        """Store the response of a claimed request and wake local duplicates"""
+        cache_key = self._key(scope, key)
+        try:
+            await self.backend.set(
+                cache_key,
+                {"state": DONE, "fingerprint": fingerprint, "response": response},
+                ttl=self.ttl,
+            )
+        finally:
+            self._wake(cache_key)
+
+    async def release(self, scope: str, key: str) -> None:
+        """Drop a claim without a response, so a retry runs the request again"""
+        cache_key = self._key(scope, key)
+        try:
+            await self.backend.delete(cache_key)
+        finally:
+            self._wake(cache_key)
+
+    def _wake(self, cache_key: str) -> None:
+        event = self._inflight.pop(cache_key, None)
+        if event is not None:
+            event.set()
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _parse_routes(routes: Iterable[str]) -> set:
+    """"POST /orders/" entries into (method, path) pairs"""
+    parsed = set()
+    for route in routes:
+        method, path = route.split(None, 1)
+        parsed.add((method.upper(), path.strip()))
+    return parsed
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware making the configured routes safe to retry.
+
+    The key comes from the IDEMPOTENCY_HEADER header, or failing that from
+    one of IDEMPOTENCY_BODY_FIELDS in the JSON body (e.g. the chatbot's
+    message id). Requests without a key run as before. Successful and
+    deterministic client error responses are stored and replayed with an
+    Idempotent-Replayed header; server errors and transient statuses such
+    as 429 release the key so that the retry runs again.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: Optional[IdempotencyStore] = None,
+        routes: Optional[Iterable[str]] = None,
+    ):
+        self.app = app
+        self.store = store or idempotency_store
+        self.routes = _parse_routes(routes or settings.IDEMPOTENCY_ROUTES)
+        self.header = settings.IDEMPOTENCY_HEADER.lower().encode()
+        self.body_fields: List[str] = settings.IDEMPOTENCY_BODY_FIELDS
+
+    def _header_key(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return value.decode("latin-1").strip() or None
+        return None
+
+    def _body_key(self, body: bytes) -> Optional[str]:
+        if not self.body_fields:
+            return None
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        for field in self.body_fields:
+            value = data.get(field)
+            if isinstance(value, (str, int)) and not isinstance(value, bool) and value != "":
+                return f"{field}:{value}"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+
+        body, disconnected = await _read_body(receive)
+
+        replayed = False
+
+        async def replay_receive():
+            # Hand the buffered body to the app, then pass through (e.g. disconnects)
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        key = self._header_key(scope) or self._body_key(body)
+        if key is None or disconnected:
+            await self.app(scope, replay_receive, send)
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+        fingerprint = hashlib.sha256(body).hexdigest()
+        try:
+            stored = await self.store.claim(route, key, fingerprint)
+        except IdempotencyConflict as e:
+            await _send_json(send, 422, {"detail": str(e)})
+            return
+        except IdempotencyTimeout as e:
+            await _send_json(send, 409, {"detail": str(e)}, [(b"retry-after", b"1")])
+            return
+
+        if stored is not None:
+            logger.info("Replayed %s for idempotency key %s", route, key)
+            await _send_stored(send, stored)
+            return
+
+        status = 500
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [
+                    (name.lower(), value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() in REPLAYED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await self.store.release(route, key)
+            raise
+
+        response_body = b"".join(chunks)
+        try:
+            text = response_body.decode("utf-8")
+        except UnicodeDecodeError:
+            text = None
+        if not is_replayable(status) or text is None:
+            await self.store.release(route, key)
+            return
+
+        await self.store.complete(
+            route,
+            key,
+            fingerprint,
+            {
+                "status": status,
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")] for name, value in headers
+                ],
+                "body": text,
+            },
+        )
+
+
+async def _read_body(receive) -> Tuple[bytes, bool]:
+    """
+    Read the request body, returns it and whether the client disconnected
+    before sending all of it
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b"".join(chunks), True
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks), False
+
+
+async def _send_json(
+    send, status: int, content: Any, headers: Optional[List[Tuple[bytes, bytes]]] = None
+) -> None:
+    body = json.dumps(content).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_stored(send, stored: Dict[str, Any]) -> None:
+    body = stored["body"].encode("utf-8")
+    headers = [
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in stored["headers"]
+    ]
+    await send(
+        {
+            "type": "http.response.start",
+            "status": stored["status"],
+            "headers": [
+                *headers,
+                (b"content-length", str(len(body)).encode()),
+                (b"idempotent-replayed", b"true"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import time
+from enum import Enum
+from typing import Optional
+
+from src.config.settings import settings
+from src.utils.cache import CacheBackend, cache
+
+# Stored as the latest step once a code was used, so it cannot be replayed
+USED = "used"
+
+
+class OTPRateLimitError(Exception):
+    """Raised when a phone number has been sent too many OTPs"""
+
+
+class OTPStatus(str, Enum):
+    VALID = "valid"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    NOT_FOUND = "not_found"
+    TOO_MANY_ATTEMPTS = "too_many_attempts"
+
+
+class OTPEngine:
+    """
+    Issues and verifies one-time codes without storing them.
+
+    A code is an HMAC of the phone number and the time step it was issued
+    in, keyed by OTP_SECRET, so verifying recomputes it instead of reading
+    a row. The cache only holds counters: sends per number, wrong attempts,
+    and the step of the latest code, which is the only one accepted, so a
+    resend or a successful verification retires earlier codes. Only when
+    that step is missing, e.g. after the cache was flushed, are the codes
+    of every step inside the validity window tried.
+    """
+
+    prefix = "otp:"
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        backend: Optional[CacheBackend] = None,
+        digits: Optional[int] = None,
+        ttl: Optional[int] = None,
+        step: Optional[int] = None,
+    ):
+        secret = secret or settings.OTP_SECRET
+        if not secret:
+            raise ValueError("OTP_SECRET is not set, it is needed to issue and verify OTPs")
+
+        self.secret = secret.encode()
+        self.backend = backend or cache
+        self.digits = digits or settings.OTP_DIGITS
+        self.ttl = ttl or settings.OTP_TTL_SECONDS
+        self.step = step or settings.OTP_STEP_SECONDS
+        self.window = self.ttl // self.step
+        self.max_attempts = settings.OTP_MAX_ATTEMPTS
+        self.max_sends = settings.OTP_MAX_SENDS
+        self.send_window = settings.OTP_SEND_WINDOW_SECONDS
+
+    def _key(self, name: str, phone_number: str) -> str:
+        return f"{self.prefix}{name}:{phone_number}"
+
+    def _current_step(self) -> int:
+        return int(time.time()) // self.step
+
+    def code(self, phone_number: str, step: int) -> str:
+        """The code for a number issued in a given time step (RFC 4226 truncation)"""
+        digest = hmac.new(
+            self.secret, f"{phone_number}:{step}".encode(), hashlib.sha256
+        ).digest()
+        offset = digest[-1] & 0x0F
+        value = int.from_bytes(digest[offset : offset + 4], "big") & 0x7FFFFFFF
+        return str(value % 10**self.digits).zfill(self.digits)
+
+    def _matching_step(
+        self, phone_number: str, otp: str, newest: int, oldest: int
+    ) -> Optional[int]:
+        for step in range(newest, oldest - 1, -1):
+            if hmac.compare_digest(self.code(phone_number, step), otp):
+                return step
+        return None
+
+    async def issue(self, phone_number: str) -> str:
+        """Issue a code for an E.164 number, retiring any earlier one"""
+        sends = await self.backend.incr(
+            self._key("sends", phone_number), ttl=self.send_window
+        )
+        if sends > self.max_sends:
+            raise OTPRateLimitError("Too many OTP requests, try again later")
+
+        step = self._current_step()
+        await self.backend.set(
+            self._key("latest", phone_number), step, ttl=self.ttl + self.step
+        )
+        await self.backend.delete(self._key("attempts", phone_number))
+        return self.code(phone_number, step)
+
+    async def latest_step(self, phone_number: str) -> Optional[int]:
+        """The step of the code last issued to a number, None once used or unknown"""
+        latest = await self.backend.get(self._key("latest", phone_number))
+        if latest is None or latest == USED:
+            return None
+        return int(latest)
+
+    async def verify(self, phone_number: str, otp: str) -> OTPStatus:
+        """Check a code, a valid code can only be used once"""
+        attempts = await self.backend.incr(
+            self._key("attempts", phone_number), ttl=self.ttl
+        )
+        if attempts > self.max_attempts:
+            return OTPStatus.TOO_MANY_ATTEMPTS
+
+        otp = (otp or "").strip()
+        current = self._current_step()
+        latest = await self.backend.get(self._key("latest", phone_number))
+        if latest == USED:
+            return OTPStatus.INVALID
+
+        if latest is not None:
+            if not hmac.compare_digest(self.code(phone_number, int(latest)), otp):
+                return OTPStatus.INVALID
+            if int(latest) < current - self.window:
+                return OTPStatus.EXPIRED
+        elif self._matching_step(phone_number, otp, current, current - self.window) is None:
+            # No live code, tell an expired code apart from one never issued
+            expired_from = current - 2 * self.window
+            expired_step = self._matching_step(
+                phone_number, otp, current - self.window - 1, expired_from
+            )
+            if expired_step is not None:
+                return OTPStatus.EXPIRED
+            return OTPStatus.NOT_FOUND
+
+        await self.backend.set(self._key("latest", phone_number), USED, ttl=self.ttl + self.step)
+        await self.backend.delete(self._key("attempts", phone_number))
+        return OTPStatus.VALID
+
+
+otp_engine = OTPEngine()
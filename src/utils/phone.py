@@ -0,0 +1,110 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.config.settings import settings
+from src.utils.cache import TTLCache
+
+# Number types phonenumbers.is_valid_number accepts
+VALID_NUMBER_TYPES = (
+    "premium_rate",
+    "toll_free",
+    "shared_cost",
+    "voip",
+    "personal_number",
+    "pager",
+    "uan",
+    "voicemail",
+    "fixed_line",
+    "mobile",
+)
+
+# Cached marker for raw input that failed validation
+_INVALID = ""
+
+
+class PhoneNormalizer:
+    """
+    Normalizes phone numbers to E.164 with memoization.
+
+    Input that is already a valid E.164 number for the region is accepted
+    by a regex built from the phonenumbers metadata, anything else is
+    parsed once. Results, including rejections, are kept in a bounded LRU.
+
+    phonenumbers and its region metadata are loaded on first use.
+    """
+
+    def __init__(self, region: str = "TZ", maxsize: Optional[int] = None):
+        self.region = region
+        self._cache = TTLCache(maxsize=maxsize or settings.PHONE_CACHE_MAX_ENTRIES)
+        self._e164 = None
+        self.fast_path_hits = 0
+        self.parses = 0
+
+    def _e164_pattern(self) -> "re.Pattern":
+        """Compile the region's valid E.164 numbers into one regex on first use"""
+        if self._e164 is None:
+            import phonenumbers
+
+            metadata = phonenumbers.PhoneMetadata.metadata_for_region(self.region)
+            type_patterns = [
+                descriptor.national_number_pattern
+                for descriptor in (
+                    getattr(metadata, number_type) for number_type in VALID_NUMBER_TYPES
+                )
+                if descriptor is not None and descriptor.national_number_pattern
+            ]
+            self._e164 = re.compile(
+                rf"\+{metadata.country_code}"
+                rf"(?=(?:{metadata.general_desc.national_number_pattern})$)"
+                rf"(?:{'|'.join(type_patterns)})"
+            )
+        return self._e164
+
+    def _parse(self, phone_number: str) -> str:
+        if self._e164_pattern().fullmatch(phone_number):
+            self.fast_path_hits += 1
+            return phone_number
+
+        import phonenumbers
+
+        self.parses += 1
+        try:
+            parsed = phonenumbers.parse(phone_number, self.region)
+        except phonenumbers.NumberParseException:
+            return _INVALID
+
+        if not phonenumbers.is_valid_number(parsed):
+            return _INVALID
+        return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+    def _lookup(self, phone_number: str) -> str:
+        if not isinstance(phone_number, str):
+            # e.g. None or a number from a JSON body, never cached
+            return _INVALID
+        normalized = self._cache.get(phone_number)
+        if normalized is None:
+            normalized = self._parse(phone_number)
+            self._cache.set(phone_number, normalized)
+        return normalized
+
+    def normalize(self, phone_number: str) -> str:
+        """Return the E.164 form of a phone number, raising ValueError if invalid"""
+        normalized = self._lookup(phone_number)
+        if not normalized:
+            raise ValueError("Invalid phone number")
+        return normalized
+
+    def normalize_many(self, phone_numbers: Iterable[str]) -> List[Optional[str]]:
+        """Normalize many numbers, invalid ones come back as None"""
+        lookup = self._lookup
+        return [lookup(phone_number) or None for phone_number in phone_numbers]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "fast_path_hits": self.fast_path_hits,
+            "parses": self.parses,
+        }
+
+
+phone_normalizer = PhoneNormalizer()
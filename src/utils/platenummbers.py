@@ -1,5 +1,5 @@
 from pydantic import BaseModel, constr, Field, validator
-from typing import ClassVar, Union, Optional
+from typing import ClassVar, Iterable, List, Union, Optional
 import re
 
 
@@ -20,7 +20,7 @@ class PlateValidator(BaseModel):
         if not hasattr(cls, "pattern"):
             raise ValueError("Pattern not defined for plate validator")
         if not re.match(cls.pattern, v.replace("-", " ")):
-            return ValueError(
+            raise ValueError(
                 f"Invalid format for {cls.__name__}. Expected format: {cls.description}"
             )
         return v
@@ -96,6 +96,44 @@ class DealerPlate(PlateValidator):
     description: ClassVar[str] = "D-1234-ABC (e.g., D-6789-XYZ)"
 
 
+PlateResult = tuple[bool, Optional[str], Optional[str]]
+
+
+class PlateClassifier:
+    """
+    Single-pass plate classifier.
+
+    All plate type patterns are compiled into one regex with a named group
+    per type, tried in priority order, so classifying a plate is one
+    fullmatch with no model construction.
+    """
+
+    def __init__(self, plate_types: dict):
+        alternatives = [
+            f"(?P<{plate_type}>{validator_class.pattern})"
+            for plate_type, validator_class in plate_types.items()
+        ]
+        self._regex = re.compile("|".join(alternatives))
+
+    def classify(self, plate_number: str) -> PlateResult:
+        """
+        Classify a plate number
+
+        Returns:
+        tuple: (is_valid, normalized_plate, plate_type)
+        """
+        plate = plate_number.upper().replace("-", " ").strip()
+        match = self._regex.fullmatch(plate)
+        if match is None:
+            return False, None, None
+        return True, plate.replace(" ", "-"), match.lastgroup
+
+    def classify_many(self, plate_numbers: Iterable[str]) -> List[PlateResult]:
+        """Classify many plate numbers, e.g. for bulk imports"""
+        classify = self.classify
+        return [classify(plate_number) for plate_number in plate_numbers]
+
+
 class PlateNumberValidator:
     """Main class for validating and formatting Tanzanian plate numbers"""
 
@@ -126,17 +164,14 @@ class PlateNumberValidator:
         Returns:
         tuple: (is_valid, normalized_plate, plate_type)
         """
-        # Remove any existing hyphens and convert to uppercase
-        plate_number = plate_number.upper().replace("-", " ").strip()
+        return plate_classifier.classify(plate_number)
 
-        for plate_type, validator_class in cls.PLATE_TYPES.items():
-            try:
-                validated_plate = validator_class(plate=plate_number)
-                return True, validated_plate.plate, plate_type
-            except ValueError:
-                continue
-
-        return False, None, None
+    @classmethod
+    def classify_many(
+        cls, plate_numbers: Iterable[str]
+    ) -> List[tuple[bool, Optional[str], Optional[str]]]:
+        """Validate many plate numbers in one call"""
+        return plate_classifier.classify_many(plate_numbers)
 
     @classmethod
     def get_plate_format(cls, plate_type: str) -> Optional[str]:
@@ -153,3 +188,6 @@ class PlateNumberValidator:
             plate_type: validator_class.description
             for plate_type, validator_class in cls.PLATE_TYPES.items()
         }
+
+
+plate_classifier = PlateClassifier(PlateNumberValidator.PLATE_TYPES)
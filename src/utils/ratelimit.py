@@ -0,0 +1,219 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+from src.utils.cache import RedisCache, TTLCache, cache
+from src.utils.metrics import rate_limit_rejections
+from src.utils.phone import phone_normalizer
+
+
+class Limit(NamedTuple):
+    """A token bucket holding up to capacity tokens, refilled at per_second"""
+
+    capacity: float
+    per_second: float
+
+    @classmethod
+    def per_minute(cls, capacity: float, per_minute: float) -> "Limit":
+        return cls(capacity, per_minute / 60)
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0 and self.per_second > 0
+
+    @property
+    def refill_seconds(self) -> float:
+        """Time for an empty bucket to fill up, after which it can be forgotten"""
+        return self.capacity / self.per_second
+
+
+Bucket = Tuple[str, Limit]
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request finds one of its buckets empty"""
+
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(f"Rate limit {limit} exceeded, retry in {retry_after:.1f}s")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """Storage for token buckets, taking from several at once is all or nothing"""
+
+    async def take(self, buckets: Sequence[Bucket]) -> Optional[Tuple[str, float]]:
+        """
+        Take a token from every bucket, or from none of them if one is empty.
+
+        Returns None when the tokens were taken, otherwise the key of the
+        bucket that ran out and the seconds until it holds a token again.
+        """
+        raise NotImplementedError
+
+
+class MemoryTokenBuckets(TokenBuckets):
+    """
+    Per-process buckets in a bounded LRU.
+
+    A bucket expires once it would have refilled, so a missing bucket and a
+    full one are the same thing. Evicting a partly drained bucket under
+    memory pressure resets it, which errs on the side of letting requests in.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.store = TTLCache(maxsize=maxsize or settings.RATE_LIMIT_MAX_BUCKETS)
+        self._lock = threading.Lock()
+
+    async def take(self, buckets: Sequence[Bucket]) -> Optional[Tuple[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            levels: List[float] = []
+            for key, limit in buckets:
+                state = self.store.get(key)
+                if state is None:
+                    tokens = limit.capacity
+                else:
+                    tokens, updated_at = state
+                    tokens = min(limit.capacity, tokens + (now - updated_at) * limit.per_second)
+                if tokens < 1:
+                    return key, (1 - tokens) / limit.per_second
+                levels.append(tokens)
+
+            for (key, limit), tokens in zip(buckets, levels):
+                self.store.set(key, (tokens - 1, now), ttl=limit.refill_seconds)
+        return None
+
+
+# KEYS are the buckets, ARGV holds capacity and refill rate per bucket.
+# Uses the server clock so every worker refills buckets the same way.
+TAKE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local per_second = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local tokens = capacity
+    if state[1] then
+        tokens = math.min(capacity, tonumber(state[1]) + (now - tonumber(state[2])) * per_second)
+    end
+    if tokens < 1 then
+        return {i, tostring((1 - tokens) / per_second)}
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local per_second = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'updated_at', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / per_second * 1000))
+end
+return {0, '0'}
+"""
+
+
+class RedisTokenBuckets(TokenBuckets):
+    """Buckets in the shared Redis cache, updated by one script call per check"""
+
+    def __init__(self, backend: RedisCache):
+        self.backend = backend
+        self.script = backend.client.register_script(TAKE_SCRIPT)
+
+    async def take(self, buckets: Sequence[Bucket]) -> Optional[Tuple[str, float]]:
+        args: List[float] = []
+        for _, limit in buckets:
+            args.extend((limit.capacity, limit.per_second))
+        index, retry_after = await self.script(
+            keys=[self.backend._key(key) for key, _ in buckets], args=args
+        )
+        if int(index) == 0:
+            return None
+        return buckets[int(index) - 1][0], float(retry_after)
+
+
+def build_token_buckets(name: Optional[str] = None) -> TokenBuckets:
+    """Build the bucket storage configured in settings"""
+    name = name or settings.RATE_LIMIT_BACKEND
+    if name == "memory":
+        return MemoryTokenBuckets()
+    if name == "cache":
+        # Follows CACHE_BACKEND, buckets are only shared between workers on Redis
+        if isinstance(cache, RedisCache):
+            return RedisTokenBuckets(cache)
+        return MemoryTokenBuckets()
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+class OTPRateLimiter:
+    """
+    Token buckets in front of every endpoint that sends an OTP.
+
+    Each request takes a token from its phone number's bucket, its client
+    IP's bucket and the global bucket. It is checked before the request
+    touches the database, so a retry storm costs neither a write nor an
+    SMS. A limit with a zero capacity or rate is switched off.
+    """
+
+    prefix = "ratelimit:otp:"
+
+    def __init__(
+        self,
+        buckets: Optional[TokenBuckets] = None,
+        phone: Optional[Limit] = None,
+        ip: Optional[Limit] = None,
+        total: Optional[Limit] = None,
+    ):
+        self.buckets = buckets or build_token_buckets()
+        self.limits: Dict[str, Limit] = {
+            "phone": phone
+            or Limit.per_minute(
+                settings.RATE_LIMIT_OTP_PHONE_BURST, settings.RATE_LIMIT_OTP_PHONE_PER_MINUTE
+            ),
+            "ip": ip
+            or Limit.per_minute(
+                settings.RATE_LIMIT_OTP_IP_BURST, settings.RATE_LIMIT_OTP_IP_PER_MINUTE
+            ),
+            "global": total
+            or Limit.per_minute(
+                settings.RATE_LIMIT_OTP_GLOBAL_BURST, settings.RATE_LIMIT_OTP_GLOBAL_PER_MINUTE
+            ),
+        }
+
+    @staticmethod
+    def _phone_key(phone_number: str) -> str:
+        """E.164 when the number parses, so 07... and +2557... share a bucket"""
+        try:
+            return phone_normalizer.normalize(phone_number)
+        except ValueError:
+            return phone_number.strip()
+
+    async def check(self, phone_number: Optional[str], client_ip: Optional[str]) -> None:
+        """Take a token for the request, raising RateLimitExceeded if one is out"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        keys = {
+            "phone": self._phone_key(phone_number) if phone_number else None,
+            "ip": client_ip,
+            "global": "all",
+        }
+        buckets = [
+            (f"{self.prefix}{name}:{keys[name]}", limit)
+            for name, limit in self.limits.items()
+            if limit.enabled and keys[name]
+        ]
+        if not buckets:
+            return
+
+        exceeded = await self.buckets.take(buckets)
+        if exceeded is not None:
+            key, retry_after = exceeded
+            name = key[len(self.prefix) :].split(":", 1)[0]
+            rate_limit_rejections.inc(f"otp_{name}")
+            raise RateLimitExceeded(name, retry_after)
+
+
+otp_rate_limiter = OTPRateLimiter()
@@ -1,4 +1,4 @@
-import phonenumbers
+from src.utils.phone import phone_normalizer
 from src.utils.platenummbers import PlateNumberValidator
 from random import SystemRandom
 from typing import Literal
@@ -9,19 +9,9 @@ class Utilities:
 
     def validate_phone_number(self, phone_number: str) -> str:
         """
-        Validate a phone number
+        Validate a phone number and return it in E.164 format
         """
-        valid_phone_number = phonenumbers.is_valid_number(
-            phonenumbers.parse(phone_number, "TZ")
-        )
-        if not valid_phone_number:
-            raise ValueError("Invalid phone number")
-
-        new_phone_number = phonenumbers.format_number(
-            phonenumbers.parse(phone_number, "TZ"),
-            phonenumbers.PhoneNumberFormat.E164,
-        )
-        return new_phone_number
+        return phone_normalizer.normalize(phone_number)
 
     def buttons_list(self, _id: str, title: str):
         return {"type": "reply", "reply": {"id": f"{_id}", "title": title}}
@@ -0,0 +1,13 @@
+import asyncio
+from src.config.log_config import configure_logging
+from src.tasks.Outbox import run_worker
+from src.tasks.Payments import run_payment_worker
+
+
+async def main() -> None:
+    configure_logging()
+    await asyncio.gather(run_worker(), run_payment_worker())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())